@@ -0,0 +1,85 @@
+"""
+Generadores de datasets sintéticos para los benchmarks de toolbox_ML.
+
+Cada esquema imita la mezcla de tipos de columna de uno de los datasets de data/:
+- "carprice": CarPrice_Assignment.csv, target numérico continuo 'price', muchas numéricas y categóricas de texto.
+- "titanic": titanic.csv, target 'fare', muchas binarias/categóricas pequeñas y pocas numéricas.
+- "lifesat": lifesat_full.csv, target 'Life satisfaction' y casi todo numérico continuo.
+
+Los datasets escalan en filas, columnas, cardinalidad de las categóricas y porcentaje de nulos.
+Las features se generan relacionadas con el target (unas más y otras menos) para que las funciones
+de selección tengan trabajo real que hacer.
+"""
+import numpy as np
+import pandas as pd
+
+# Proporción de cada tipo de columna (sin contar el target) en cada esquema
+SCHEMAS = {
+    "carprice": {"target": "price", "mix": {"continua": 0.55, "discreta": 0.12, "categorica": 0.20, "binaria": 0.13}},
+    "titanic": {"target": "fare", "mix": {"continua": 0.10, "discreta": 0.20, "categorica": 0.40, "binaria": 0.30}},
+    "lifesat": {"target": "Life satisfaction", "mix": {"continua": 0.80, "discreta": 0.00, "categorica": 0.20, "binaria": 0.00}},
+}
+
+
+def _column_counts(mix, n_cols):
+    # Reparte n_cols columnas entre los tipos respetando las proporciones (método del mayor resto)
+    raw = {tipo: share * n_cols for tipo, share in mix.items()}
+    counts = {tipo: int(v) for tipo, v in raw.items()}
+    remaining = n_cols - sum(counts.values())
+    for tipo in sorted(raw, key=lambda t: raw[t] - counts[t], reverse=True)[:remaining]:
+        counts[tipo] += 1
+    return counts
+
+
+def _categorize(values, n_levels, rng, noise=1.0):
+    # Convierte un valor latente en códigos de categoría cuyo reparto depende del target
+    latent = values + rng.normal(scale=noise, size=len(values))
+    ranks = latent.argsort().argsort()
+    return (ranks * n_levels // len(values)).astype(np.int64)
+
+
+def make_dataset(schema="carprice", n_rows=1000, n_cols=26, cardinality=10, nan_rate=0.0, seed=0):
+    '''
+    Genera un DataFrame sintético con la mezcla de columnas de 'schema'.
+
+    Argumentos:
+    schema (str): uno de los esquemas de SCHEMAS.
+    n_rows (int): número de filas.
+    n_cols (int): número total de columnas, incluido el target.
+    cardinality (int): número de niveles de las columnas categóricas de texto.
+    nan_rate (float): fracción de valores nulos en cada feature (el target no tiene nulos).
+    seed (int): semilla del generador aleatorio.
+
+    Retorna:
+    pd.DataFrame: dataset con el target en la última columna.
+    '''
+    spec = SCHEMAS[schema]
+    rng = np.random.default_rng(seed)
+    z = rng.normal(size=n_rows)
+    counts = _column_counts(spec["mix"], max(n_cols - 1, 1))
+
+    columns = {}
+    for i in range(counts["continua"]):
+        # Cada columna tiene una fuerza de relación distinta con el target
+        weight = rng.uniform(-1, 1)
+        columns[f"num_{i}"] = weight * z + rng.normal(scale=1.0, size=n_rows)
+    for i in range(counts["discreta"]):
+        levels = int(rng.integers(15, 60))
+        columns[f"disc_{i}"] = _categorize(rng.uniform(-1, 1) * z, levels, rng, noise=2.0)
+    labels = np.array([f"level_{j}" for j in range(cardinality)], dtype=object)
+    for i in range(counts["categorica"]):
+        columns[f"cat_{i}"] = labels[_categorize(rng.uniform(-1, 1) * z, cardinality, rng, noise=2.0)]
+    for i in range(counts["binaria"]):
+        columns[f"bin_{i}"] = np.where(_categorize(rng.uniform(-1, 1) * z, 2, rng, noise=2.0) == 1, "yes", "no").astype(object)
+
+    df = pd.DataFrame(columns)
+    if nan_rate > 0:
+        for col in df.columns:
+            mask = rng.random(n_rows) < nan_rate
+            if df[col].dtype.kind in "iu":
+                df[col] = df[col].astype(np.float64)
+            df.loc[mask, col] = np.nan
+
+    # Target continuo positivo, como un precio o una tarifa
+    df[spec["target"]] = np.round(np.exp(1 + 0.5 * z) * 1000, 2)
+    return df
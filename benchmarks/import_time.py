@@ -0,0 +1,72 @@
+"""
+Comprueba el presupuesto de tiempo de importación de toolbox_ML.
+
+Importa el módulo en procesos nuevos (para no reutilizar la caché de módulos), toma la mediana
+de varias ejecuciones y falla (código de salida 1) si supera el presupuesto o si al importar se
+han cargado librerías pesadas que deberían cargarse de forma diferida.
+
+Uso:
+    python benchmarks/import_time.py [--budget SEGUNDOS] [--runs N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Presupuesto por defecto (segundos) para "import toolbox_ML" en un proceso nuevo
+IMPORT_TIME_BUDGET = 1.0
+# Librerías que no deben cargarse al importar toolbox_ML
+LAZY_MODULES = ["matplotlib", "seaborn", "scipy"]
+
+SNIPPET = """
+import json, sys, time
+t = time.perf_counter()
+import toolbox_ML
+elapsed = time.perf_counter() - t
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (LAZY_MODULES,)
+
+
+def measure_import(runs=5):
+    '''
+    Mide el tiempo de importación de toolbox_ML en 'runs' procesos nuevos.
+
+    Retorna:
+    dict: mediana de los tiempos en segundos ('seconds'), todos los tiempos ('runs')
+          y librerías diferidas que se hayan cargado durante la importación ('loaded').
+    '''
+    times = []
+    loaded = set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", SNIPPET], cwd=REPO_DIR, capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        times.append(result["seconds"])
+        loaded.update(result["loaded"])
+    return {"seconds": statistics.median(times), "runs": times, "loaded": sorted(loaded)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Comprueba el presupuesto de tiempo de importación de toolbox_ML")
+    parser.add_argument("--budget", type=float, default=IMPORT_TIME_BUDGET, help="presupuesto en segundos")
+    parser.add_argument("--runs", type=int, default=5, help="número de importaciones a medir")
+    args = parser.parse_args(argv)
+
+    result = measure_import(args.runs)
+    print(f"import toolbox_ML: {result['seconds']:.3f} s (mediana de {args.runs}, presupuesto {args.budget:.3f} s)")
+
+    errors = []
+    if result["loaded"]:
+        errors.append(f"Se han cargado librerías que deberían importarse de forma diferida: {result['loaded']}")
+    if result["seconds"] > args.budget:
+        errors.append(f"El tiempo de importación supera el presupuesto de {args.budget:.3f} s")
+    for e in errors:
+        print(e)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Benchmarks de las funciones públicas de toolbox_ML sobre datasets sintéticos.
+
+Mide el tiempo (mediana de varias repeticiones, sin tracemalloc) y, en una ejecución aparte, el pico
+de memoria reservada (tracemalloc) de describe_df, tipifica_variables, get_features_num_regression,
+get_features_cat_regression, plot_features_num_regression y plot_features_cat_regression para cada
+combinación de filas, columnas, cardinalidad y porcentaje de nulos, y guarda los resultados en JSON.
+
+Uso:
+    python benchmarks/run_benchmarks.py --rows 1000 100000 --cols 10 100 --output bench.json
+    python benchmarks/run_benchmarks.py --compare antes.json despues.json
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import matplotlib
+matplotlib.use("Agg")  # Sin ventanas: plt.show() no bloquea
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+# Se cargan aquí para que su importación diferida no se mida dentro del primer benchmark
+import scipy.stats
+import seaborn
+
+import functions as fnc
+import toolbox_ML as toolbox
+from datasets import SCHEMAS, make_dataset
+from import_time import measure_import
+
+
+# Cada benchmark recibe el dataframe y el nombre del target
+BENCHMARKS = {
+    "describe_df": lambda df, target: toolbox.describe_df(df),
+    "tipifica_variables": lambda df, target: toolbox.tipifica_variables(df),
+    "get_features_num_regression": lambda df, target: toolbox.get_features_num_regression(df, target, 0.1, 0.05),
+    "get_features_cat_regression": lambda df, target: toolbox.get_features_cat_regression(df, target, [], 0.05),
+    "plot_features_num_regression": lambda df, target: toolbox.plot_features_num_regression(df, target, [], 0.3, 0.05),
+    "plot_features_cat_regression": lambda df, target: toolbox.plot_features_cat_regression(df, target, [], 0.05),
+}
+
+
+def run_one(func, df, target, repeat):
+    '''
+    Ejecuta un benchmark 'repeat' veces sobre el mismo dataframe para medir el tiempo y una vez más,
+    aparte, para medir el pico de memoria: tracemalloc registra cada reserva y ralentiza de forma
+    desigual las funciones, así que los tiempos se toman sin él.
+
+    Retorna:
+    dict: tiempos de cada repetición, su mediana y el pico de memoria reservada en bytes.
+    '''
+    times = []
+    for _ in range(repeat):
+        # Cada repetición parte sin perfiles en caché para medir el trabajo completo
+        fnc.clear_profile_cache()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()): # Los mensajes de las funciones no interesan aquí
+            func(df, target)
+        times.append(time.perf_counter() - start)
+        plt.close("all")
+
+    fnc.clear_profile_cache()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        func(df, target)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    plt.close("all")
+    return {"seconds": times, "median_s": statistics.median(times), "peak_bytes": peak}
+
+
+def run_suite(schemas, rows, cols, cardinalities, nan_rates, functions, repeat=3, seed=0, verbose=True):
+    '''
+    Ejecuta los benchmarks para todas las combinaciones de parámetros.
+
+    Retorna:
+    list: un diccionario por función y combinación con los parámetros del dataset y las medidas.
+    '''
+    results = []
+    for schema, n_rows, n_cols, cardinality, nan_rate in itertools.product(schemas, rows, cols, cardinalities, nan_rates):
+        df = make_dataset(schema, n_rows, n_cols, cardinality, nan_rate, seed)
+        target = SCHEMAS[schema]["target"]
+        for name in functions:
+            measure = run_one(BENCHMARKS[name], df, target, repeat)
+            result = {"function": name, "schema": schema, "rows": n_rows, "cols": n_cols,
+                      "cardinality": cardinality, "nan_rate": nan_rate, **measure}
+            results.append(result)
+            if verbose:
+                print(f"{name:30s} {schema:9s} rows={n_rows:<9d} cols={n_cols:<6d} card={cardinality:<6d} "
+                      f"nan={nan_rate:<5} {measure['median_s']:9.4f} s {measure['peak_bytes'] / 1024**2:10.1f} MiB")
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata():
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def _key(result):
+    return (result["function"], result["schema"], result["rows"], result["cols"], result["cardinality"], result["nan_rate"])
+
+
+def compare(old_path, new_path):
+    '''
+    Compara dos ficheros de resultados e imprime, para cada medida común, la relación de tiempos y memoria.
+    '''
+    with open(old_path) as f:
+        old = {_key(r): r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = {_key(r): r for r in json.load(f)["results"]}
+
+    for key in sorted(old.keys() & new.keys(), key=str):
+        o, n = old[key], new[key]
+        speedup = o["median_s"] / n["median_s"] if n["median_s"] > 0 else float("inf")
+        mem_ratio = o["peak_bytes"] / n["peak_bytes"] if n["peak_bytes"] > 0 else float("inf")
+        name, schema, n_rows, n_cols, cardinality, nan_rate = key
+        print(f"{name:30s} {schema:9s} rows={n_rows:<9d} cols={n_cols:<6d} card={cardinality:<6d} nan={nan_rate:<5} "
+              f"{o['median_s']:9.4f} s -> {n['median_s']:9.4f} s (x{speedup:6.2f})  memoria x{mem_ratio:6.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de toolbox_ML sobre datasets sintéticos")
+    parser.add_argument("--schemas", nargs="+", default=["carprice"], choices=sorted(SCHEMAS))
+    parser.add_argument("--rows", nargs="+", type=int, default=[1000, 10000])
+    parser.add_argument("--cols", nargs="+", type=int, default=[26])
+    parser.add_argument("--cardinality", nargs="+", type=int, default=[10])
+    parser.add_argument("--nan-rate", nargs="+", type=float, default=[0.0])
+    parser.add_argument("--functions", nargs="+", default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-import-time", action="store_true", help="no medir el tiempo de importación")
+    parser.add_argument("--output", default=None, help="fichero JSON donde guardar los resultados")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DESPUES"), help="compara dos ficheros de resultados")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    meta = metadata()
+    if not args.skip_import_time:
+        meta["import_time"] = measure_import()
+    results = run_suite(args.schemas, args.rows, args.cols, args.cardinality, args.nan_rate, args.functions, args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"meta": meta, "results": results}, f, indent=2)
+        print(f"Resultados guardados en {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,960 @@
+import contextlib
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+import tracemalloc
+import weakref
 import pandas as pd
 import numpy as np
 import variables as var
-from pandas.api.types import is_numeric_dtype
+from pandas.api.types import is_numeric_dtype, is_bool_dtype
 
-import toolbox_ML as toolbox
+from collections import OrderedDict
 
-from scipy import stats
+logger = logging.getLogger("toolbox_ML")
+
+# Informe estructurado de una ejecución trazada con trace(): una fila por etapa (validación, tipificación, estadísticos,
+# gráficos...) y, cuando la etapa se mide columna a columna, por columna, con el tiempo de reloj, las filas recorridas y el
+# pico de memoria reservada (solo si la traza se abre con memory=True). También guarda los mensajes que las funciones
+# muestran al usuario, con la etapa en la que se produjeron
+class RunReport:
+    def __init__(self, memory=False, callback=None):
+        self.memory = memory
+        self.callback = callback
+        self.records = []
+        self.messages = []
+        self._stack = []
+
+    def add(self, record):
+        self.records.append(record)
+        logger.debug("etapa %(stage)s columna=%(column)s filas=%(rows)s %(seconds).6f s pico=%(peak_bytes)s bytes", record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def add_message(self, message):
+        self.messages.append({"stage": self._stack[-1].name if self._stack else None, "message": message})
+
+    # Registros como dataframe, en el orden en el que terminaron las etapas
+    def to_dataframe(self):
+        return pd.DataFrame(self.records, columns=["stage", "column", "parent", "depth", "rows", "n_columns", "seconds", "peak_bytes"])
+
+    # Totales por etapa: número de registros, tiempo y filas acumulados y mayor pico de memoria
+    def summary(self):
+        return self.to_dataframe().groupby("stage", sort=False).agg(
+            calls=("seconds", "size"), seconds=("seconds", "sum"), rows=("rows", "sum"), peak_bytes=("peak_bytes", "max"))
+
+    def __repr__(self):
+        return f"RunReport({len(self.records)} etapas, {len(self.messages)} mensajes)"
+
+# Medición de una etapa dentro de la traza activa. Las etapas se pueden anidar: el pico de memoria de la etapa exterior
+# incluye el de las interiores aunque tracemalloc.reset_peak se llame al entrar en cada una
+class _Stage:
+    def __init__(self, report, name, column, rows, n_columns):
+        self.report = report
+        self.name = name
+        self.column = column
+        self.rows = rows
+        self.n_columns = n_columns
+
+    def __enter__(self):
+        stack = self.report._stack
+        self.parent = stack[-1] if stack else None
+        stack.append(self)
+        self.base = None
+        self.child_peak = 0
+        if self.report.memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            if self.parent is not None:
+                self.parent.child_peak = max(self.parent.child_peak, peak)
+            tracemalloc.reset_peak()
+            self.base = current
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        peak_bytes = None
+        if self.base is not None:
+            peak = max(tracemalloc.get_traced_memory()[1], self.child_peak)
+            peak_bytes = peak - self.base
+            if self.parent is not None:
+                self.parent.child_peak = max(self.parent.child_peak, peak)
+        self.report._stack.pop()
+        self.report.add({"stage": self.name, "column": self.column, "parent": self.parent.name if self.parent else None,
+                         "depth": len(self.report._stack), "rows": self.rows, "n_columns": self.n_columns,
+                         "seconds": seconds, "peak_bytes": peak_bytes})
+        return False
+
+# Traza activa (None si no se está trazando) y contexto vacío que devuelve stage() en ese caso
+_active_report = None
+_NO_TRACE = contextlib.nullcontext()
+
+# Abre una traza: mientras dure, las etapas instrumentadas con stage() se registran en el RunReport devuelto.
+# Con memory=True se mide además el pico de memoria con tracemalloc (que ralentiza la ejecución).
+# 'callback' se llama con cada registro según termina su etapa
+@contextlib.contextmanager
+def trace(memory=False, callback=None):
+    global _active_report
+    report = RunReport(memory, callback)
+    previous = _active_report
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    _active_report = report
+    try:
+        yield report
+    finally:
+        _active_report = previous
+        if started:
+            tracemalloc.stop()
+
+# Contexto que mide una etapa ('column', 'rows' y 'n_columns' son opcionales y pueden asignarse dentro del bloque).
+# Sin traza activa solo cuesta una comprobación
+def stage(name, column=None, rows=None, n_columns=None):
+    if _active_report is None:
+        return _NO_TRACE
+    return _Stage(_active_report, name, column, rows, n_columns)
+
+# Decorador de las funciones públicas: con una traza activa registra la llamada completa como una etapa con el nombre de
+# la función, de la que cuelgan sus etapas interiores
+def traced(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _active_report is None:
+            return func(*args, **kwargs)
+        with _Stage(_active_report, func.__name__, None, None, None):
+            return func(*args, **kwargs)
+    return wrapper
+
+# Muestra un mensaje al usuario con print, lo emite como registro de log y, si hay una traza activa,
+# lo guarda en su informe
+def report_message(message):
+    print(message)
+    logger.info(message)
+    if _active_report is not None:
+        _active_report.add_message(message)
+
+# Perfil de las columnas de un dataframe: tipo de dato, número de nulos y cardinalidad de cada columna,
+# junto con el tipo sugerido por tipifica_variables. Se calcula una única vez por dataframe (ver get_column_profile)
+# y lo comparten describe_df, tipifica_variables, is_valid_params y las funciones de selección de features
+class ColumnProfile:
+    def __init__(self, n_rows, dtypes, null_count, cardinality):
+        self.n_rows = n_rows
+        self.dtypes = dtypes
+        self.null_count = null_count
+        self.cardinality = cardinality
+        self._tipos = {}
+
+    # Perfil de un dataframe en memoria. Con 'approx=True' la cardinalidad se estima con HyperLogLog
+    # (exacta para cardinalidades pequeñas) en lugar de con nunique()
+    @classmethod
+    def from_dataframe(cls, dataframe, approx=False):
+        if approx:
+            return ProfileAccumulator(approx=True).update(dataframe).to_profile()
+        return cls(len(dataframe), dataframe.dtypes, dataframe.isna().sum(), dataframe.nunique())
+
+    # Perfil de una tabla de Arrow calculado con los kernels de pyarrow.compute, sin convertirla a pandas.
+    # Los tipos de dato y los nulos se reportan como los tendría table.to_pandas() (NaN cuenta como nulo)
+    @classmethod
+    def from_arrow(cls, table, approx=False):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        pandas_dtypes = table.schema.empty_table().to_pandas().dtypes
+        dtypes, null_count, cardinality = [], [], []
+        for i, name in enumerate(table.column_names):
+            column = table.column(i)
+            nan_count = (pc.sum(pc.is_nan(column)).as_py() or 0) if pa.types.is_floating(column.type) else 0
+            dtype = pandas_dtypes.iloc[i]
+            # to_pandas convierte los enteros con nulos a float64 y los booleanos con nulos a object
+            if column.null_count > 0 and pa.types.is_integer(column.type):
+                dtype = np.dtype(np.float64)
+            elif column.null_count > 0 and pa.types.is_boolean(column.type):
+                dtype = np.dtype(object)
+            dtypes.append(dtype)
+            null_count.append(column.null_count + nan_count)
+            if approx:
+                cardinality.append(CardinalityCounter().add(column.drop_null()).count())
+            else:
+                cardinality.append(pc.count_distinct(column, mode="only_valid").as_py() - (nan_count > 0))
+
+        index = pd.Index(table.column_names, dtype=object)
+        return cls(table.num_rows, pd.Series(dtypes, index=index, dtype=object),
+                   pd.Series(null_count, index=index, dtype=np.int64), pd.Series(cardinality, index=index, dtype=np.int64))
+
+    @property
+    def columns(self):
+        return self.dtypes.index
+
+    # Columnas numéricas (sin booleanos), como df.select_dtypes(include=np.number)
+    def numeric_columns(self):
+        return [col for col, dtype in self.dtypes.items() if is_numeric_dtype(dtype) and not is_bool_dtype(dtype)]
+
+    # Columnas no numéricas, como df.select_dtypes(exclude=[np.number])
+    def non_numeric_columns(self):
+        numeric = set(self.numeric_columns())
+        return [col for col in self.columns if col not in numeric]
+
+    # Tabla de describe_df: tipo de dato, missings, valores únicos y porcentaje de cardinalidad por columna
+    def describe(self):
+        df_resultado = pd.DataFrame([self.dtypes, self.null_count*100, self.cardinality, round(self.cardinality/self.n_rows * 100, 2)]) # Cardinaliad y porcentaje de variación de cardinalidad
+        df_resultado = df_resultado.rename(index= {0: "DATA_TYPE", 1: "MISSINGS (%)", 2: "UNIQUE_VALUES", 3: "CARDIN (%)"})
+        return df_resultado.T
+
+    # Tabla de tipifica_variables: nombre de la variable y tipo sugerido
+    def tipifica(self, umbral_categoria=var.UMBRAL_CATEGORIA, umbral_continua=var.UMBRAL_CONTINUA):
+        tipos = self.tipos(umbral_categoria, umbral_continua)
+        return pd.DataFrame([{var.COLUMN_NOMBRE: columna, var.COLUMN_TIPO: tipo} for columna, tipo in tipos.items()])
+
+    # Devuelve una serie con el tipo sugerido para cada columna en función de los umbrales
+    def tipos(self, umbral_categoria=var.UMBRAL_CATEGORIA, umbral_continua=var.UMBRAL_CONTINUA):
+        key = (umbral_categoria, umbral_continua)
+        if key not in self._tipos:
+            self._tipos[key] = pd.Series([tipo_variable(cardinalidad, cardinalidad / self.n_rows * 100, umbral_categoria, umbral_continua)
+                                          for cardinalidad in self.cardinality], index=self.columns, dtype=object)
+        return self._tipos[key]
+
+    # Devuelve las columnas cuyo tipo sugerido está en 'tipos'
+    def columns_of_type(self, tipos, umbral_categoria=var.UMBRAL_CATEGORIA, umbral_continua=var.UMBRAL_CONTINUA):
+        df_tipos = self.tipos(umbral_categoria, umbral_continua)
+        return df_tipos[df_tipos.isin(tipos)].index.to_list()
+
+# Tipo sugerido para una variable en base a su cardinalidad y porcentaje de cardinalidad
+def tipo_variable(cardinalidad, porcentaje_cardinalidad, umbral_categoria=var.UMBRAL_CATEGORIA, umbral_continua=var.UMBRAL_CONTINUA):
+    if cardinalidad == 2:
+        return var.TIPO_BINARIA
+    elif cardinalidad < umbral_categoria:
+        return var.TIPO_CATEGORICA
+    elif porcentaje_cardinalidad >= umbral_continua: #mayor que umbral categoria, mayor o igual que umbral continua
+        return var.TIPO_NUM_CONTINUA
+    else:
+        return var.TIPO_NUM_DISCRETA #el porcentaje de cardinalidad es menor que umbral continua
+
+# Versión compacta de una columna según su tipo sugerido y su cardinalidad, sin perder información:
+# - enteros al entero con signo más pequeño que admite su rango
+# - decimales a float32 solo si todos sus valores se representan exactamente en float32
+# - texto/objetos binarios cuyos valores son True/False (sin missings) a bool
+# - resto de texto/objetos a 'category' (códigos enteros + categorías) si es Binaria o Categórica, o si su
+#   cardinalidad no supera 'max_category_ratio' veces el número de filas (con más valores únicos no compensa)
+# Las numéricas se mantienen numéricas aunque sean Binarias o Categóricas para que las funciones de selección las sigan
+# tratando igual. Los bool y las 'category' se devuelven tal cual
+def compact_column(series, tipo, cardinalidad, max_category_ratio=var.CATEGORY_MAX_RATIO):
+    dtype = series.dtype
+    if is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+        return series
+    if is_numeric_dtype(dtype):
+        if dtype.kind in "iu":
+            return pd.to_numeric(series, downcast="integer")
+        if dtype.kind == "f" and dtype.itemsize > 4:
+            values = series.to_numpy()
+            with np.errstate(over="ignore"):
+                compact = values.astype(np.float32)
+            if np.array_equal(compact.astype(dtype), values, equal_nan=True):
+                return pd.Series(compact, index=series.index, name=series.name)
+        return series
+    if tipo == var.TIPO_BINARIA and not series.hasnans and all(isinstance(v, (bool, np.bool_)) for v in series.unique()):
+        return series.astype(bool)
+    if tipo in (var.TIPO_BINARIA, var.TIPO_CATEGORICA) or cardinalidad <= max_category_ratio * len(series):
+        try:
+            return series.astype("category")
+        except TypeError: # Valores no hasheables (listas, diccionarios...)
+            return series
+    return series
+
+# Estado acumulado del perfil de columnas sobre una secuencia de bloques (chunks) de un mismo dataset:
+# filas, nulos, tipo de dato promocionado y valores únicos de cada columna.
+# En modo exacto los valores únicos se cuentan hasta 'max_cardinality' por columna; a partir de ahí la columna
+# queda saturada, se deja de guardar sus valores y su cardinalidad se reporta como la cota inferior alcanzada.
+# En modo aproximado ('approx=True') cada columna usa un CardinalityCounter (exacto para cardinalidades pequeñas
+# y HyperLogLog por encima) con memoria fija por columna.
+# Dos acumuladores construidos sobre particiones distintas del mismo dataset se pueden combinar con merge()
+class ProfileAccumulator:
+    def __init__(self, max_cardinality=None, memory_budget=var.CHUNK_MEMORY_BUDGET, approx=False):
+        self.n_rows = 0
+        self.dtypes = {}
+        self.null_count = {}
+        self.uniques = {}
+        self.saturated = {}
+        self.max_cardinality = max_cardinality
+        self.memory_budget = memory_budget
+        self.approx = approx
+
+    # Incorpora un bloque de filas al estado acumulado
+    def update(self, chunk):
+        if self.max_cardinality is None and not self.approx:
+            # La mitad del presupuesto se reserva para los valores únicos de todas las columnas
+            self.max_cardinality = max(int(self.memory_budget / 2 / max(len(chunk.columns), 1) / var.BYTES_PER_UNIQUE_VALUE), 1)
+
+        self.n_rows += len(chunk)
+        null_count = chunk.isna().sum()
+        for col in chunk.columns:
+            self.dtypes[col] = promote_dtype(self.dtypes[col], chunk[col].dtype) if col in self.dtypes else chunk[col].dtype
+            self.null_count[col] = self.null_count.get(col, 0) + int(null_count[col])
+            if self.approx:
+                self.uniques.setdefault(col, CardinalityCounter()).add(chunk[col].dropna())
+            elif col not in self.saturated:
+                self.uniques.setdefault(col, set()).update(chunk[col].dropna().unique())
+                self._check_saturation(col)
+        return self
+
+    # Combina el estado de otro acumulador (por ejemplo, de otra partición del dataset) con este
+    def merge(self, other):
+        if self.approx != other.approx:
+            raise ValueError("No se pueden combinar acumuladores exactos y aproximados")
+        if self.max_cardinality is None or (other.max_cardinality is not None and other.max_cardinality < self.max_cardinality):
+            self.max_cardinality = other.max_cardinality
+
+        self.n_rows += other.n_rows
+        for col, dtype in other.dtypes.items():
+            self.dtypes[col] = promote_dtype(self.dtypes[col], dtype) if col in self.dtypes else dtype
+            self.null_count[col] = self.null_count.get(col, 0) + other.null_count[col]
+            if self.approx:
+                self.uniques.setdefault(col, CardinalityCounter()).merge(other.uniques[col])
+            elif col in self.saturated or col in other.saturated:
+                self.saturated[col] = max(self.saturated.get(col, 0), other.saturated.get(col, 0),
+                                          len(self.uniques.get(col) or ()), len(other.uniques.get(col) or ()))
+                self.uniques[col] = None
+            else:
+                self.uniques.setdefault(col, set()).update(other.uniques[col])
+                self._check_saturation(col)
+        return self
+
+    def _check_saturation(self, col):
+        if len(self.uniques[col]) > self.max_cardinality:
+            self.saturated[col] = len(self.uniques[col])
+            self.uniques[col] = None
+
+    # Devuelve el perfil de columnas con el estado acumulado hasta el momento
+    def to_profile(self):
+        columns = list(self.dtypes)
+        if self.approx:
+            cardinality = [self.uniques[col].count() for col in columns]
+        else:
+            cardinality = [self.saturated[col] if col in self.saturated else len(self.uniques[col]) for col in columns]
+        return ColumnProfile(self.n_rows,
+                             pd.Series(self.dtypes, index=columns, dtype=object),
+                             pd.Series(self.null_count, index=columns, dtype=np.int64),
+                             pd.Series(cardinality, index=columns, dtype=np.int64))
+
+# Sketch HyperLogLog para estimar la cardinalidad de una columna con memoria fija (2**precision registros de un byte).
+# El error relativo típico es 1.04 / sqrt(2**precision) (~0.8% con la precisión por defecto) y dos sketches con la
+# misma precisión se combinan tomando el máximo de sus registros
+class HyperLogLog:
+    def __init__(self, precision=var.HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype=np.uint8)
+
+    # Añade un array de valores (sin nulos) al sketch
+    def add(self, values):
+        self.add_hashes(hash_values(values))
+        return self
+
+    # Añade un array de hashes de 64 bits al sketch
+    def add_hashes(self, hashes):
+        if len(hashes) == 0:
+            return self
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        # Posición del primer bit a 1 en los 64 - p bits restantes
+        rest = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        if self.precision != other.precision:
+            raise ValueError("Los sketches HyperLogLog deben tener la misma precisión para combinarse")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        # Corrección para rangos pequeños (linear counting)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+# Número de bits significativos de cada elemento de un array de enteros sin signo de 64 bits
+def _bit_length(values):
+    # El exponente de frexp da la longitud en bits salvo cuando el redondeo a float64 sube a la siguiente potencia de 2
+    exponent = np.frexp(values.astype(np.float64))[1]
+    shift = np.maximum(exponent - 1, 0).astype(np.uint64)
+    return np.where(values == 0, 0, exponent - ((values >> shift) == 0))
+
+# Hash de 64 bits de un array de valores. Los numéricos se normalizan a float64 para que un mismo valor tenga
+# el mismo hash aunque aparezca como entero en un bloque y como decimal en otro
+def hash_values(values):
+    values = np.asarray(values)
+    if values.dtype.kind in "mM":
+        values = values.view(np.int64)
+    elif is_numeric_dtype(values.dtype) and not is_bool_dtype(values.dtype):
+        values = values.astype(np.float64)
+    elif values.dtype != object:
+        values = values.astype(object)
+    # Sin categorize, hash_array no factoriza el array completo (que en columnas de texto con muchos valores distintos
+    # reserva tanta memoria como la propia columna)
+    return pd.util.hash_array(values, categorize=False)
+
+# Contador de cardinalidad de una columna: alimenta siempre un sketch HyperLogLog y, mientras la cardinalidad no
+# supere 'exact_limit', guarda además el conjunto de hashes distintos para dar un recuento exacto. Así las
+# cardinalidades pequeñas (las que deciden si una variable es Binaria o Categórica) son exactas y la memoria por
+# columna queda acotada. Los valores (array de NumPy, Series de pandas o columna de Arrow) se hashean por tramos de
+# var.HLL_BATCH_ROWS filas, de modo que tampoco se materializa la columna completa como objetos de Python
+class CardinalityCounter:
+    def __init__(self, exact_limit=var.HLL_EXACT_LIMIT, precision=var.HLL_PRECISION):
+        self.exact_limit = exact_limit
+        self.sketch = HyperLogLog(precision)
+        self.hashes = set()
+
+    def add(self, values):
+        for start in range(0, len(values), var.HLL_BATCH_ROWS):
+            self._add_hashes(hash_values(_slice_values(values, start, start + var.HLL_BATCH_ROWS)))
+        return self
+
+    def _add_hashes(self, hashes):
+        self.sketch.add_hashes(hashes)
+        if self.hashes is not None:
+            # Si el sketch ya indica una cardinalidad claramente superior al límite no merece la pena el recuento exacto
+            if self.sketch.count() > 2 * self.exact_limit:
+                self.hashes = None
+            else:
+                self.hashes.update(np.unique(hashes).tolist())
+                self._check_limit()
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        if self.hashes is not None and other.hashes is not None:
+            self.hashes.update(other.hashes)
+            self._check_limit()
+        else:
+            self.hashes = None
+        return self
+
+    def _check_limit(self):
+        if len(self.hashes) > self.exact_limit:
+            self.hashes = None
+
+    def count(self):
+        return len(self.hashes) if self.hashes is not None else self.sketch.count()
+
+# Filas [start, stop) de un array de NumPy, una Series de pandas o una columna de Arrow como array de NumPy
+def _slice_values(values, start, stop):
+    if hasattr(values, "iloc"):
+        return values.iloc[start:stop].to_numpy()
+    if hasattr(values, "num_chunks"):
+        return arrow_to_numpy(values.slice(start, stop - start))
+    return np.asarray(values)[start:stop]
+
+# Tipo de dato común de una columna leída en varios bloques, tal y como lo habría inferido pandas al leerla completa:
+# los numéricos se promocionan entre sí (int -> float) y cualquier bloque no numérico convierte la columna en no numérica
+def promote_dtype(dtype_a, dtype_b):
+    if dtype_a == dtype_b:
+        return dtype_a
+    a_num = is_numeric_dtype(dtype_a) and not is_bool_dtype(dtype_a)
+    b_num = is_numeric_dtype(dtype_b) and not is_bool_dtype(dtype_b)
+    if a_num and b_num:
+        return np.result_type(dtype_a, dtype_b)
+    if a_num:
+        return dtype_b
+    if b_num:
+        return dtype_a
+    return np.dtype(object)
+
+# Genera los bloques de un dataset a partir de la ruta de un CSV o de un iterable de dataframes.
+# Si no se indica 'chunksize' para un CSV, se calcula a partir de 'memory_budget' estimando el tamaño por fila con una muestra
+def iter_chunks(source, chunksize=None, memory_budget=var.CHUNK_MEMORY_BUDGET):
+    if isinstance(source, (str, os.PathLike)):
+        if chunksize is None:
+            sample = pd.read_csv(source, nrows=var.CHUNK_SAMPLE_ROWS)
+            bytes_per_row = max(sample.memory_usage(deep=True).sum() / max(len(sample), 1), 1)
+            # La otra mitad del presupuesto se reserva para el bloque en memoria
+            chunksize = max(int(memory_budget / 2 / bytes_per_row), 1)
+        with pd.read_csv(source, chunksize=chunksize) as reader:
+            yield from reader
+    else:
+        yield from source
+
+# Perfil de columnas de un dataset leído por bloques, con memoria acotada por 'memory_budget'
+def profile_from_chunks(source, chunksize=None, memory_budget=var.CHUNK_MEMORY_BUDGET, max_cardinality=None, approx=False):
+    accumulator = ProfileAccumulator(max_cardinality, memory_budget, approx)
+    for chunk in iter_chunks(source, chunksize, memory_budget):
+        with stage("tipificacion", rows=len(chunk), n_columns=chunk.shape[1]):
+            accumulator.update(chunk)
+    return accumulator.to_profile()
+
+# Acceso por columnas común a pandas, Arrow y Polars. Las funciones de perfilado y selección aceptan cualquiera de los
+# tres: los DataFrame de Polars se pasan a tabla de Arrow (sin copia) y las tablas de Arrow se leen columna a columna
+# con vistas NumPy de sus buffers o kernels de pyarrow.compute, sin convertir la tabla completa a pandas
+
+def is_arrow_table(data):
+    return type(data).__module__.startswith("pyarrow") and hasattr(data, "schema") and hasattr(data, "column_names")
+
+def is_polars_frame(data):
+    return type(data).__module__.startswith("polars") and hasattr(data, "to_arrow")
+
+# Devuelve los DataFrame de pandas y las tablas de Arrow tal cual y convierte los DataFrame de Polars a tabla de Arrow
+def as_table(data):
+    return data.to_arrow() if is_polars_frame(data) else data
+
+# Nombres de las columnas
+def frame_columns(data):
+    data = as_table(data)
+    return list(data.column_names) if is_arrow_table(data) else list(data.columns)
+
+def is_cached_frame(data):
+    return isinstance(data, CachedFrame)
+
+# Array NumPy de una columna de Arrow. Si la columna es de un único bloque, sin nulos y de tipo primitivo, es una vista sin copia
+def arrow_to_numpy(column):
+    if hasattr(column, "num_chunks") and column.num_chunks == 1:
+        column = column.chunk(0)
+    return column.to_numpy(zero_copy_only=False)
+
+# Valores de una columna como array float64 con NaN en los missings
+def column_values(data, col):
+    data = as_table(data)
+    if is_arrow_table(data):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        column = data.column(col)
+        if column.type != pa.float64():
+            column = pc.cast(column, pa.float64())
+        return np.asarray(arrow_to_numpy(column), dtype=np.float64)
+    if is_cached_frame(data):
+        return data.column_values(col)
+    return data[col].to_numpy(dtype=np.float64, na_value=np.nan)
+
+# Matriz float64 (filas x columnas) con los valores de 'columns'
+def numeric_matrix(data, columns):
+    data = as_table(data)
+    if is_arrow_table(data) or is_cached_frame(data):
+        matrix = np.empty((data.num_rows, len(columns)), dtype=np.float64)
+        for i, col in enumerate(columns):
+            matrix[:, i] = column_values(data, col)
+        return matrix
+    return data[columns].to_numpy(dtype=np.float64, na_value=np.nan)
+
+# Factoriza una columna: códigos enteros por fila (-1 para los missings) y categorías en orden de aparición, como pd.factorize.
+# En Arrow se usa dictionary_encode, que no materializa los valores como objetos de Python
+def factorize_column(data, col):
+    data = as_table(data)
+    if is_arrow_table(data):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        column = data.column(col).combine_chunks()
+        if pa.types.is_floating(column.type):
+            column = pc.if_else(pc.is_nan(column), pa.scalar(None, column.type), column)
+        encoded = column.dictionary_encode()
+        codes = pc.fill_null(encoded.indices, -1).to_numpy(zero_copy_only=False).astype(np.intp)
+        return codes, pd.Index(encoded.dictionary.to_pandas())
+    if is_cached_frame(data):
+        return data.factorize(col)
+    return pd.factorize(data[col])
+
+# Convierte a pandas solo las columnas indicadas (para las funciones que pintan gráficos)
+def to_pandas(data, columns):
+    data = as_table(data)
+    if is_arrow_table(data):
+        return data.select(columns).to_pandas()
+    if is_cached_frame(data):
+        return data.to_pandas(columns)
+    return data[columns]
+
+# Dataset cargado desde una caché columnar en disco (ver build_csv_cache): las columnas numéricas son arrays .npy
+# abiertos como memoria mapeada y las de texto se guardan codificadas como diccionario (códigos .npy + fichero de
+# categorías). Las funciones de perfilado y selección trabajan directamente sobre estos arrays sin volver a leer el CSV
+class CachedFrame:
+    def __init__(self, cache_path, meta):
+        self.cache_path = cache_path
+        self.meta = meta
+        self.columns = [column["name"] for column in meta["columns"]]
+        self.num_rows = meta["n_rows"]
+        self._columns = {column["name"]: column for column in meta["columns"]}
+        self._categories = {}
+        index = pd.Index(self.columns)
+        self.profile = ColumnProfile(
+            self.num_rows,
+            pd.Series([pd.api.types.pandas_dtype(c["dtype"]) for c in meta["columns"]], index=index, dtype=object),
+            pd.Series([c["null_count"] for c in meta["columns"]], index=index, dtype=np.int64),
+            pd.Series([c["cardinality"] for c in meta["columns"]], index=index, dtype=np.int64))
+
+    def __len__(self):
+        return self.num_rows
+
+    # Array (memoria mapeada) de una columna almacenada por valores
+    def values(self, col):
+        return np.load(os.path.join(self.cache_path, self._columns[col]["file"]), mmap_mode="r")
+
+    # Códigos (memoria mapeada, -1 para los missings) y categorías de una columna codificada como diccionario
+    def codes(self, col):
+        column = self._columns[col]
+        if col not in self._categories:
+            with open(os.path.join(self.cache_path, column["categories"]), encoding="utf-8") as f:
+                self._categories[col] = pd.Index(json.load(f), dtype=object)
+        return np.load(os.path.join(self.cache_path, column["file"]), mmap_mode="r"), self._categories[col]
+
+    def is_dictionary(self, col):
+        return self._columns[col]["kind"] == "dictionary"
+
+    def column_values(self, col):
+        if self.is_dictionary(col):
+            return self.to_pandas([col])[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        return np.asarray(self.values(col), dtype=np.float64)
+
+    # Igual que pd.factorize: para las columnas de texto los códigos ya están calculados en la caché
+    def factorize(self, col):
+        if self.is_dictionary(col):
+            codes, categories = self.codes(col)
+            return np.asarray(codes, dtype=np.intp), categories
+        return pd.factorize(self.values(col))
+
+    # DataFrame de pandas con las columnas indicadas (todas por defecto), con los mismos tipos que pd.read_csv
+    def to_pandas(self, columns=None):
+        data = {}
+        for col in (self.columns if columns is None else columns):
+            dtype = self.profile.dtypes[col]
+            if self.is_dictionary(col):
+                codes, categories = self.codes(col)
+                values = np.asarray(categories, dtype=object).take(codes, mode="clip") if len(categories) else np.full(len(codes), np.nan, dtype=object)
+                values[np.asarray(codes) < 0] = np.nan
+                data[col] = pd.Series(values, dtype=dtype)
+            else:
+                data[col] = pd.Series(np.asarray(self.values(col)), dtype=dtype)
+        return pd.DataFrame(data)
+
+# Ruta de la caché en disco de un CSV: un directorio por fichero dentro de 'cache_dir' (por defecto, var.CACHE_DIR_NAME
+# junto al CSV)
+def csv_cache_path(path, cache_dir=None):
+    path = os.path.abspath(path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(path), var.CACHE_DIR_NAME)
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{os.path.basename(path)}-{digest}")
+
+# Devuelve los metadatos de la caché si existe y corresponde al CSV actual (mismo tamaño y fecha de modificación)
+def read_csv_cache_meta(path, cache_path):
+    meta_file = os.path.join(cache_path, "meta.json")
+    if not os.path.exists(meta_file):
+        return None
+    with open(meta_file, encoding="utf-8") as f:
+        meta = json.load(f)
+    stat = os.stat(path)
+    if meta.get("version") != var.CACHE_VERSION or meta["size"] != stat.st_size or meta["mtime_ns"] != stat.st_mtime_ns:
+        return None
+    return meta
+
+# Convierte un CSV a la caché columnar leyéndolo por bloques (memoria acotada por 'memory_budget'). Cada columna se
+# clasifica con el primer bloque: numérica (enteros, decimales o booleanos), que se guarda por valores, o de texto, que
+# se codifica como diccionario. Si un bloque posterior no encaja con esa clasificación, la conversión se repite leyendo
+# esa columna como texto. Devuelve los metadatos de la caché creada
+def build_csv_cache(path, cache_path, chunksize=None, memory_budget=var.CHUNK_MEMORY_BUDGET):
+    forced_text = set()
+    while True:
+        tmp_path = f"{cache_path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        try:
+            meta = _write_csv_cache(path, tmp_path, forced_text, chunksize, memory_budget)
+        except _ColumnKindChanged as e:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            forced_text.add(e.column)
+            continue
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        shutil.rmtree(cache_path, ignore_errors=True)
+        os.replace(tmp_path, cache_path)
+        return meta
+
+class _ColumnKindChanged(Exception):
+    def __init__(self, column):
+        super().__init__(column)
+        self.column = column
+
+def _write_csv_cache(path, cache_path, forced_text, chunksize, memory_budget):
+    stat = os.stat(path)
+    accumulator = ProfileAccumulator(max_cardinality=np.iinfo(np.int64).max)
+    columns = None
+    files = {}
+    kinds = {}
+    categories = {}
+    if chunksize is None:
+        sample = pd.read_csv(path, nrows=var.CHUNK_SAMPLE_ROWS, dtype={col: object for col in forced_text})
+        chunksize = max(int(memory_budget / 2 / max(sample.memory_usage(deep=True).sum() / max(len(sample), 1), 1)), 1)
+
+    try:
+        with pd.read_csv(path, chunksize=chunksize, dtype={col: object for col in forced_text}) as reader:
+            for chunk in reader:
+                if columns is None:
+                    columns = list(chunk.columns)
+                    for i, col in enumerate(columns):
+                        numeric = is_numeric_dtype(chunk[col].dtype) and col not in forced_text
+                        kinds[col] = "values" if numeric else "dictionary"
+                        files[col] = open(os.path.join(cache_path, f"{i}.raw"), "wb")
+                        categories[col] = pd.Index([], dtype=object)
+                accumulator.update(chunk)
+                for col in columns:
+                    series = chunk[col]
+                    if kinds[col] == "values":
+                        if not is_numeric_dtype(series.dtype):
+                            raise _ColumnKindChanged(col)
+                        files[col].write(series.to_numpy(dtype=np.float64, na_value=np.nan).tobytes())
+                    else:
+                        if col not in forced_text and is_numeric_dtype(series.dtype) and series.notna().any():
+                            # Bloque numérico en una columna de texto: pd.read_csv la leería entera como texto
+                            raise _ColumnKindChanged(col)
+                        codes, uniques = pd.factorize(series)
+                        new = uniques[~pd.Index(uniques, dtype=object).isin(categories[col])]
+                        categories[col] = categories[col].append(pd.Index(new, dtype=object))
+                        mapping = categories[col].get_indexer(pd.Index(uniques, dtype=object))
+                        chunk_codes = np.where(codes >= 0, mapping[np.maximum(codes, 0)] if len(mapping) else -1, -1)
+                        files[col].write(chunk_codes.astype(np.int32).tobytes())
+    finally:
+        for f in files.values():
+            f.close()
+
+    profile = accumulator.to_profile()
+    meta_columns = []
+    for i, col in enumerate(columns or []):
+        raw_file = os.path.join(cache_path, f"{i}.raw")
+        dtype = profile.dtypes[col]
+        column = {"name": col, "kind": kinds[col], "dtype": str(dtype), "file": f"{i}.npy",
+                  "null_count": int(profile.null_count[col]), "cardinality": int(profile.cardinality[col])}
+        if kinds[col] == "values":
+            # Valores guardados como float64 durante la lectura; se pasan al tipo final de la columna
+            raw = np.fromfile(raw_file, dtype=np.float64)
+            np.save(os.path.join(cache_path, column["file"]), raw.astype(np.dtype(dtype)))
+        else:
+            np.save(os.path.join(cache_path, column["file"]), np.fromfile(raw_file, dtype=np.int32))
+            column["categories"] = f"{i}.categories.json"
+            with open(os.path.join(cache_path, column["categories"]), "w", encoding="utf-8") as f:
+                json.dump([_json_value(v) for v in categories[col]], f)
+        os.remove(raw_file)
+        meta_columns.append(column)
+
+    meta = {"version": var.CACHE_VERSION, "source": os.path.abspath(path), "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns, "n_rows": profile.n_rows, "columns": meta_columns}
+    with open(os.path.join(cache_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    return meta
+
+# Convierte los escalares de NumPy a tipos nativos de Python para guardarlos en JSON
+def _json_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+# Carga un CSV desde su caché columnar, creándola (o recreándola si el CSV ha cambiado de tamaño o de fecha de
+# modificación) cuando haga falta
+def load_csv_cache(path, cache_dir=None, chunksize=None, memory_budget=var.CHUNK_MEMORY_BUDGET):
+    cache_path = csv_cache_path(path, cache_dir)
+    meta = read_csv_cache_meta(path, cache_path)
+    if meta is None:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        meta = build_csv_cache(path, cache_path, chunksize, memory_budget)
+    return CachedFrame(cache_path, meta)
+
+# Caché persistente de estadísticos: los estadísticos por columna de las funciones de selección (correlación, p-valor,
+# estadístico del test y número de observaciones) se guardan en disco indexados por el contenido del dataset, el target y
+# el tipo de cálculo, de modo que repetir una selección con otros umbrales no vuelve a recorrer los datos. Cada entrada es
+# un .npz en 'cache_dir' llamado <hash del dataset>-<hash del target>-<hash del cálculo>.npz con una fila por columna
+# ya calculada; las columnas que falten se calculan y se añaden a la entrada. El tamaño total del directorio se acota
+# a 'max_bytes' borrando las entradas usadas hace más tiempo
+
+# Hash del contenido de un dataset (nombres, tipos y valores de todas las columnas, sin el índice). Se hashean
+# directamente los buffers de cada columna (valores NumPy, códigos y categorías de las 'category', buffers de Arrow) y
+# solo las columnas de objetos de Python pasan por pd.util.hash_pandas_object. Las cachés columnares en disco son
+# inmutables y se identifican por sus metadatos (CSV de origen, tamaño y fecha de modificación)
+def dataset_hash(dataframe):
+    data = as_table(dataframe)
+    digest = hashlib.sha1()
+    if is_cached_frame(data):
+        digest.update(json.dumps(data.meta, sort_keys=True, default=str).encode("utf-8"))
+        return digest.hexdigest()
+    for col in frame_columns(data):
+        column = data.column(col) if is_arrow_table(data) else data[col]
+        digest.update(repr((col, str(column.type if is_arrow_table(data) else column.dtype), len(column))).encode("utf-8"))
+        _update_column_hash(digest, column)
+    return digest.hexdigest()
+
+def _update_column_hash(digest, column):
+    if hasattr(column, "num_chunks"): # Columna de Arrow
+        for chunk in column.chunks:
+            _update_arrow_hash(digest, chunk)
+        return
+    dtype = column.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        digest.update(np.ascontiguousarray(column.cat.codes.to_numpy()).tobytes())
+        _update_column_hash(digest, pd.Series(column.cat.categories))
+    elif isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        digest.update(np.ascontiguousarray(column.to_numpy()).tobytes())
+    elif hasattr(column.array, "__arrow_array__"): # Texto y tipos de pandas respaldados por Arrow
+        import pyarrow as pa
+        _update_column_hash(digest, pa.chunked_array(column.array.__arrow_array__()))
+    else:
+        digest.update(pd.util.hash_pandas_object(column, index=False).to_numpy().tobytes())
+
+# Hashea los buffers de un array de Arrow (y los de sus hijos y diccionario) junto con su desplazamiento y longitud
+def _update_arrow_hash(digest, array):
+    digest.update(repr((array.offset, len(array), array.null_count)).encode("utf-8"))
+    for buffer in array.buffers():
+        if buffer is not None:
+            digest.update(memoryview(buffer))
+    if hasattr(array, "dictionary"):
+        _update_arrow_hash(digest, array.dictionary)
+
+def _short_hash(value):
+    return hashlib.sha1(repr(value).encode("utf-8")).hexdigest()[:16]
+
+# Ruta de la entrada de la caché de estadísticos de un dataset (por su hash), un target y un tipo de cálculo
+def stats_cache_path(cache_dir, data_hash, target_col, kind):
+    return os.path.join(cache_dir, f"{data_hash}-{_short_hash(target_col)}-{_short_hash((kind, var.STATS_CACHE_VERSION))}.npz")
+
+# Lee una entrada de la caché como dataframe indexado por columna (None si no existe o no se puede leer) y la marca como usada
+def _read_stats_entry(path):
+    try:
+        with np.load(path, allow_pickle=False) as entry:
+            stats = pd.DataFrame({name: entry[name] for name in entry.files if name != "columns"},
+                                 index=pd.Index([json.loads(col) for col in entry["columns"]], dtype=object))
+        os.utime(path)
+    except (OSError, ValueError, KeyError):
+        return None
+    return stats
+
+# Guarda una entrada de la caché de forma atómica y aplica el límite de tamaño del directorio
+def _write_stats_entry(path, stats, max_bytes):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}.npz"
+    # Los nombres de columna se guardan en JSON para conservar su tipo (texto o entero)
+    np.savez(tmp_path, columns=np.asarray([json.dumps(col) for col in stats.index], dtype=str), **{name: stats[name].to_numpy() for name in stats.columns})
+    os.replace(tmp_path, path)
+    evict_stats_cache(os.path.dirname(path) or ".", max_bytes)
+
+# Borra las entradas usadas hace más tiempo hasta que el tamaño total de la caché no supere 'max_bytes'
+def evict_stats_cache(cache_dir, max_bytes=var.STATS_CACHE_MAX_BYTES):
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".npz") and ".tmp-" not in name:
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime_ns, stat.st_size, name))
+    total = sum(size for _, size, _ in entries)
+    for _, size, name in sorted(entries):
+        if total <= max_bytes:
+            break
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(cache_dir, name))
+        total -= size
+
+# Estadísticos de 'columns' con la caché de 'cache_dir': se leen de la entrada del dataset, el target y el tipo de cálculo
+# ('kind', que incluye los parámetros que cambian los estadísticos) y solo las columnas que falten se calculan con
+# 'compute(columnas)', que debe devolver un dataframe indexado por columna. Si el dataset no se puede hashear (valores
+# como listas o diccionarios) o tiene nombres de columna que no son texto o enteros, se calcula todo sin caché
+def cached_stats(cache_dir, dataframe, target_col, columns, kind, compute, max_bytes=var.STATS_CACHE_MAX_BYTES):
+    if not all(isinstance(col, (str, int)) for col in [target_col, *columns]):
+        return compute(columns)
+    with stage("cache", n_columns=len(columns)):
+        try:
+            path = stats_cache_path(cache_dir, dataset_hash(dataframe), target_col, kind)
+        except TypeError:
+            return compute(columns)
+        stats = _read_stats_entry(path)
+    missing = list(columns) if stats is None else [col for col in columns if col not in stats.index]
+    if missing:
+        computed = compute(missing)
+        stats = computed if stats is None else pd.concat([stats, computed])
+        with stage("cache", n_columns=len(missing)):
+            _write_stats_entry(path, stats, max_bytes)
+    result = stats.loc[list(columns)]
+    result.index = pd.Index(list(columns), dtype=object)
+    return result
+
+# Borra las entradas de la caché de estadísticos: todas, las de un dataset o las de un dataset y un target.
+# Devuelve el número de entradas borradas
+def clear_stats_cache(cache_dir, dataframe=None, target_col=None):
+    if not os.path.isdir(cache_dir):
+        return 0
+    prefix = "" if dataframe is None else f"{dataset_hash(dataframe)}-"
+    if dataframe is not None and target_col is not None:
+        prefix += f"{_short_hash(target_col)}-"
+    removed = 0
+    for name in os.listdir(cache_dir):
+        if name.endswith(".npz") and name.startswith(prefix):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(os.path.join(cache_dir, name))
+                removed += 1
+    return removed
+
+# Caché LRU de perfiles indexada por la huella de cada dataframe. Las entradas de pandas guardan también una referencia
+# débil al dataframe para no confundirlo con otro que reutilice su id después de que el primero se haya liberado
+_profile_cache = OrderedDict()
+
+# Huella barata de un dataframe: identidad, forma, columnas, tipos y hash de una muestra espaciada de filas.
+# No detecta las modificaciones en el sitio de filas fuera de la muestra: tras modificar un dataframe en el sitio hay que
+# llamar a clear_profile_cache()
+def _fingerprint(dataframe):
+    step = max(len(dataframe) // var.PROFILE_SAMPLE_ROWS, 1)
+    try:
+        sample_hash = int(pd.util.hash_pandas_object(dataframe.iloc[::step], index=True).sum())
+    except TypeError: # Columnas con valores no hasheables (listas, diccionarios...)
+        sample_hash = None
+    return (id(dataframe), dataframe.shape, tuple(dataframe.columns), tuple(map(str, dataframe.dtypes)), sample_hash)
+
+# Devuelve el perfil de columnas del dataframe (pandas, Arrow o Polars), calculándolo solo si no está ya en la caché.
+# Las tablas de Arrow (y los DataFrame de Polars, que se convierten a una tabla nueva en cada llamada) se identifican por
+# el hash de sus buffers (dataset_hash), que se leen sin copiarlos
+def get_column_profile(dataframe, approx=False):
+    dataframe = as_table(dataframe)
+    if is_cached_frame(dataframe):
+        # El perfil de una caché en disco se calcula al crearla y se guarda con ella
+        return dataframe.profile
+    if is_arrow_table(dataframe):
+        key = ("arrow", dataset_hash(dataframe), approx)
+        ref = None
+    else:
+        key = _fingerprint(dataframe) + (approx,)
+        ref = weakref.ref(dataframe)
+    entry = _profile_cache.get(key)
+    if entry is None or (ref is not None and entry[0]() is not dataframe):
+        with stage("tipificacion", rows=len(dataframe), n_columns=len(frame_columns(dataframe))):
+            profile = ColumnProfile.from_arrow(dataframe, approx) if is_arrow_table(dataframe) else ColumnProfile.from_dataframe(dataframe, approx)
+        _profile_cache[key] = (ref, profile)
+        _profile_cache.move_to_end(key)
+        if len(_profile_cache) > var.PROFILE_CACHE_SIZE:
+            _profile_cache.popitem(last=False)
+        return profile
+    _profile_cache.move_to_end(key)
+    return entry[1]
+
+# Vacía la caché de perfiles de columnas
+def clear_profile_cache():
+    _profile_cache.clear()
 
 def is_valid_params(dataframe, target_col, columns, target_type=[], columns_type=[]):
+    with stage("validacion", n_columns=len(columns)):
+        mensajes = _check_params(dataframe, target_col, columns, target_type, columns_type)
+
+    for m in mensajes:
+        report_message(m)
+
+    return len(mensajes) == 0
+
+def _check_params(dataframe, target_col, columns, target_type, columns_type):
     mensajes = []
 
-    df_types = toolbox.tipifica_variables(dataframe, var.UMBRAL_CATEGORIA, var.UMBRAL_CONTINUA)
+    profile = get_column_profile(dataframe)
 
     # Analisis variable target_col
     if target_col not in dataframe.columns: # Control para ver si 'target_col' existe en el dataframe
         mensajes.append(f"La columna target '{target_col}' no existe en el dataframe")
     else:
         if len(target_type) > 0: # Control para ver si 'target_col' es una variable del tipo especificado
-            target_type_list = df_types[df_types[var.COLUMN_TIPO].isin(target_type)][var.COLUMN_NOMBRE].to_list() #Columnas del dataframe que son del tipo 'target_type'
+            target_type_list = profile.columns_of_type(target_type) #Columnas del dataframe que son del tipo 'target_type'
             if not target_col in target_type_list:
                 mensajes.append(f"La columna '{target_col}' no es una variable de tipo {target_type}")
 
@@ -26,7 +963,7 @@ def is_valid_params(dataframe, target_col, columns, target_type=[], columns_type
         col_not_exist_list = []
         col_not_type_list = []
 
-        column_type_list = df_types[df_types[var.COLUMN_TIPO].isin(columns_type)][var.COLUMN_NOMBRE].to_list() #Columnas del dataframe que son del tipo 'columns_type'
+        column_type_list = profile.columns_of_type(columns_type) #Columnas del dataframe que son del tipo 'columns_type'
 
         for col in columns:
             if col not in dataframe.columns: # Control para ver si las columnas 'columns' existen en el dataframe
@@ -43,10 +980,7 @@ def is_valid_params(dataframe, target_col, columns, target_type=[], columns_type
         if len(col_not_type_list) > 0:
             mensajes.append(f"Las siguientes columnas no son del tipo {columns_type}: {col_not_type_list}")
 
-    for m in mensajes:
-        print(m)
-
-    return len(mensajes) == 0
+    return mensajes
 
 # Devuelve las variables númericas especificadas en el parámetro 'columns'
 def get_num_colums(dataframe, columns=[]):
@@ -67,17 +1001,326 @@ def is_valid_numeric(dataframe, target_col, columms=[]):
                 not_number_columns.append(col)
         
         if len(not_number_columns) > 0:
-            print(f"Las siguientes columnas no son numéricas: {not_number_columns}")
+            report_message(f"Las siguientes columnas no son numéricas: {not_number_columns}")
         else:
             result = True
     
     return result
 
+# Calcula en una única pasada vectorizada la correlación de Pearson de cada columna de 'x' (matriz filas x columnas)
+# contra el vector 'y', junto con su p-valor bilateral obtenido de la distribución t de Student.
+# Los NaN se tratan por pares (pairwise-complete): para cada columna solo se usan las filas en las que
+# tanto la columna como el target tienen valor.
+# Devuelve tres arrays (r, p, n) con un valor por columna de 'x', siendo 'n' el número efectivo de observaciones
+def pearson_batch(x, y):
+    r, n = pearson_r(x, y)
+    return r, pearson_pvalues(r, n), n
+
+# Coeficiente de Pearson y número efectivo de observaciones de cada columna de 'x' contra 'y' (sin p-valores)
+def pearson_r(x, y):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if x.ndim == 1:
+        x = x.reshape(-1, 1)
+
+    x_valid = ~np.isnan(x)
+    y_valid = ~np.isnan(y)
+    if x_valid.all() and y_valid.all():
+        # Sin missings: centramos target y columnas una sola vez y calculamos todas las covarianzas con un producto matricial
+        n = np.full(x.shape[1], len(y), dtype=np.int64)
+        y_c = y - y.mean()
+        x_c = x - x.mean(axis=0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = (x_c.T @ y_c) / np.sqrt((x_c * x_c).sum(axis=0) * (y_c @ y_c))
+    else:
+        r, n = _pearson_masked(x, y, x_valid, y_valid)
+    return np.clip(r, -1.0, 1.0), n
+
+# Correlación por pares a partir de las máscaras de validez y de sumas acumuladas, sin construir una copia
+# filtrada del target para cada columna. Las sumas restringidas a las filas válidas de cada par se obtienen
+# con productos matriciales entre los valores rellenados con 0 y las máscaras
+def _pearson_masked(x, y, x_valid, y_valid):
+    x_mask = x_valid.astype(np.float64)
+    y_mask = y_valid.astype(np.float64)
+
+    # Desplazamos por la media de cada columna para mantener la estabilidad numérica de las sumas (Pearson es invariante a traslaciones)
+    x0 = np.where(x_valid, x, 0.0)
+    y0 = np.where(y_valid, y, 0.0)
+    x0 = np.where(x_valid, x0 - x0.sum(axis=0) / np.maximum(x_valid.sum(axis=0), 1), 0.0)
+    y0 = np.where(y_valid, y0 - y0.sum() / max(y_valid.sum(), 1), 0.0)
+
+    n = y_mask @ x_mask
+    sum_x = y_mask @ x0
+    sum_y = y0 @ x_mask
+    sum_xx = y_mask @ (x0 * x0)
+    sum_yy = (y0 * y0) @ x_mask
+    sum_xy = y0 @ x0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = n * sum_xy - sum_x * sum_y
+        var_x = n * sum_xx - sum_x * sum_x
+        var_y = n * sum_yy - sum_y * sum_y
+        r = cov / np.sqrt(var_x * var_y)
+    r = np.where(n >= 2, r, np.nan)
+
+    return r, n.astype(np.int64)
+
+# P-valores bilaterales de un array de coeficientes de Pearson 'r' calculados sobre 'n' observaciones.
+# 'n' puede ser un escalar o un array con el número efectivo de observaciones de cada columna
+def pearson_pvalues(r, n):
+    from scipy import stats # Importación diferida: scipy.stats solo se carga la primera vez que se calcula un p-valor
+
+    r = np.asarray(r, dtype=np.float64)
+    dof = np.asarray(n, dtype=np.float64) - 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = r * np.sqrt(dof / ((1.0 - r) * (1.0 + r)))
+        p = 2 * stats.t.sf(np.abs(t), dof)
+    # Con correlación perfecta el estadístico t es infinito y el p-valor es 0
+    p = np.where(np.abs(r) == 1.0, 0.0, p)
+    return np.where(dof > 0, p, np.nan)
+
+# Correlación de Spearman de cada columna de 'x' con 'y': Pearson sobre los rangos (promedio en los empates).
+# Las columnas sin missings (con un target sin missings) se ordenan todas a la vez como una única matriz, por bloques de
+# como mucho var.RANK_BLOCK_CELLS celdas; las columnas con missings se ordenan por separado sobre sus filas válidas en
+# común con el target. El p-valor usa la misma aproximación t de Student que Pearson (como scipy.stats.spearmanr).
+# Devuelve (r, p, n) igual que pearson_batch
+def spearman_batch(x, y):
+    from scipy.stats import rankdata
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if x.ndim == 1:
+        x = x.reshape(-1, 1)
+
+    r = np.full(x.shape[1], np.nan)
+    n = np.zeros(x.shape[1], dtype=np.int64)
+    y_valid = ~np.isnan(y)
+    complete = ~np.isnan(x).any(axis=0) & y_valid.all()
+    full_columns = np.flatnonzero(complete)
+    if len(full_columns):
+        y_rank = rankdata(y)
+        block = max(var.RANK_BLOCK_CELLS // max(len(y), 1), 1)
+        for start in range(0, len(full_columns), block):
+            cols = full_columns[start:start + block]
+            r[cols], n[cols] = pearson_r(rankdata(x[:, cols], axis=0), y_rank)
+    for col in np.flatnonzero(~complete):
+        valid = ~np.isnan(x[:, col]) & y_valid
+        if valid.any():
+            r_col, n_col = pearson_r(rankdata(x[valid, col]), rankdata(y[valid]))
+            r[col], n[col] = r_col[0], n_col[0]
+
+    return r, pearson_pvalues(r, n), n
+
+# Tau-b de Kendall de cada columna de 'x' con 'y' con el algoritmo O(n log n) de Knight: se ordenan los pares por
+# (x, y) y los pares discordantes son las inversiones de la secuencia de rangos de 'y' (ver _count_inversions).
+# Los empates se descuentan como en scipy.stats.kendalltau y el p-valor es el de su aproximación normal (asintótica).
+# Los NaN se tratan por pares y las columnas se procesan por bloques de como mucho var.RANK_BLOCK_CELLS celdas.
+# Las columnas con menos de 3 pares válidos dan NaN en tau y p. Devuelve (tau, p, n) igual que pearson_batch
+def kendall_batch(x, y):
+    from scipy import special
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if x.ndim == 1:
+        x = x.reshape(-1, 1)
+
+    # Rango denso del target (-1 en los missings), común a todas las columnas: en cualquier subconjunto de filas
+    # conserva el orden y los empates, que es todo lo que necesita el algoritmo
+    y_valid = ~np.isnan(y)
+    y_rank = np.full(len(y), -1, dtype=np.int64)
+    y_rank[y_valid] = np.unique(y[y_valid], return_inverse=True)[1]
+    y_order = np.argsort(y_rank, kind="stable")
+
+    stats = {name: np.zeros(x.shape[1]) for name in ("n", "dis", "xtie", "ytie", "ntie", "x0", "y0", "x1", "y1")}
+    block = max(var.RANK_BLOCK_CELLS // max(len(y), 1), 1)
+    for start in range(0, x.shape[1], block):
+        stop = min(start + block, x.shape[1])
+        for name, values in _kendall_block(x[:, start:stop], y_rank, y_order).items():
+            stats[name][start:stop] = values
+
+    n = stats["n"]
+    tot = n * (n - 1) / 2
+    con_minus_dis = tot - stats["xtie"] - stats["ytie"] + stats["ntie"] - 2 * stats["dis"]
+    m = n * (n - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tau = np.clip(con_minus_dis / np.sqrt(tot - stats["xtie"]) / np.sqrt(tot - stats["ytie"]), -1.0, 1.0)
+        variance = ((m * (2 * n + 5) - stats["x1"] - stats["y1"]) / 18 + 2 * stats["xtie"] * stats["ytie"] / m
+                    + np.where(n > 2, stats["x0"] * stats["y0"] / (9 * m * (n - 2)), 0.0))
+        p = special.erfc(np.abs(con_minus_dis / np.sqrt(variance)) / np.sqrt(2))
+    # Con menos de 3 pares no hay grados de libertad: NaN, igual que pearson_batch y spearman_batch, para que el filtro
+    # por p-valor se comporte igual con los tres métodos
+    tau = np.where(n >= 3, tau, np.nan)
+    return tau, np.where(np.isnan(tau), np.nan, p), n.astype(np.int64)
+
+# Recuentos de pares de un bloque de columnas para la tau-b de Kendall: número de observaciones válidas, pares
+# discordantes y sumas de empates en x, en y y en ambos a la vez. Los rangos de y de cada columna, ordenados por (x, y),
+# se concatenan en un único array en el que cada columna es un segmento, y las inversiones de todos los segmentos se
+# cuentan a la vez. 'y_order' es el orden estable de 'y_rank'; con él, una ordenación estable por x da el orden (x, y)
+def _kendall_block(x, y_rank, y_order):
+    n_columns = x.shape[1]
+    x_valid = ~np.isnan(x)
+    complete = x_valid.all(axis=0)
+    valid_rows = y_order[y_rank[y_order] >= 0]
+
+    # Columnas sin missings: se ordenan todas juntas como una matriz
+    ranks, xs = {}, {}
+    if complete.any():
+        x_sorted = x[valid_rows][:, complete]
+        order = np.argsort(x_sorted, axis=0, kind="stable")
+        sorted_x = np.take_along_axis(x_sorted, order, axis=0)
+        for i, col in enumerate(np.flatnonzero(complete)):
+            ranks[col] = y_rank[valid_rows[order[:, i]]]
+            xs[col] = sorted_x[:, i]
+    # Columnas con missings: cada una sobre sus filas válidas en común con el target
+    for col in np.flatnonzero(~complete):
+        rows = valid_rows[x_valid[valid_rows, col]]
+        order = np.argsort(x[rows, col], kind="stable")
+        ranks[col] = y_rank[rows[order]]
+        xs[col] = x[rows[order], col]
+
+    n = np.array([len(ranks[col]) for col in range(n_columns)], dtype=np.int64)
+    if n.sum() == 0:
+        return {"n": n}
+    values = np.concatenate([ranks[col] for col in range(n_columns)])
+    sorted_x = np.concatenate([xs[col] for col in range(n_columns)])
+    col = np.repeat(np.arange(n_columns), n)
+    new_col = np.zeros(len(values), dtype=bool)
+    new_col[(np.cumsum(n) - n)[n > 0]] = True
+    new_x = new_col | np.r_[True, sorted_x[1:] != sorted_x[:-1]]
+    new_xy = new_x | np.r_[True, values[1:] != values[:-1]]
+    xtie, x0, x1 = _tie_sums(new_x, col, n_columns)
+
+    # Empates en y: recuentos de cada rango dentro de cada columna
+    y_counts = np.bincount(col * (int(values.max()) + 1) + values).astype(np.float64)
+    y_counts_col = np.repeat(np.arange(n_columns), int(values.max()) + 1)[:len(y_counts)]
+    t = y_counts
+    ytie = np.bincount(y_counts_col, weights=t * (t - 1) / 2, minlength=n_columns)
+    y0 = np.bincount(y_counts_col, weights=t * (t - 1) * (t - 2), minlength=n_columns)
+    y1 = np.bincount(y_counts_col, weights=t * (t - 1) * (2 * t + 5), minlength=n_columns)
+
+    return {"n": n, "dis": _count_inversions(values, n), "xtie": xtie, "ytie": ytie,
+            "ntie": _tie_sums(new_xy, col, n_columns)[0], "x0": x0, "y0": y0, "x1": x1, "y1": y1}
+
+# Sumas por columna sobre los grupos de empates (tramos que empiezan donde 'new_run' es True) de tamaño t:
+# t(t-1)/2, t(t-1)(t-2) y t(t-1)(2t+5), como en scipy.stats.kendalltau
+def _tie_sums(new_run, col, n_columns):
+    starts = np.flatnonzero(new_run)
+    t = np.diff(np.r_[starts, len(new_run)]).astype(np.float64)
+    run_col = col[starts]
+    return (np.bincount(run_col, weights=t * (t - 1) / 2, minlength=n_columns),
+            np.bincount(run_col, weights=t * (t - 1) * (t - 2), minlength=n_columns),
+            np.bincount(run_col, weights=t * (t - 1) * (2 * t + 5), minlength=n_columns))
+
+# Número de inversiones (pares i < j con values[i] > values[j]) de cada segmento de 'values' (enteros >= 0), siendo
+# 'lengths' la longitud de cada segmento. Es una ordenación radix desde el bit más significativo: en cada nivel, los
+# elementos con el mismo prefijo (segmento y bits superiores) están juntos y en su orden original; los pares que se
+# invierten por el bit actual son un 1 seguido de un 0 dentro del mismo prefijo, y después cada grupo se parte de forma
+# estable en ceros y unos. Son O(n) operaciones vectorizadas por bit, O(n log n) en total
+def _count_inversions(values, lengths):
+    bits = max(int(values.max()).bit_length(), 1)
+    # El segmento ocupa los bits altos, de modo que los prefijos de distintos segmentos nunca coinciden
+    dtype = np.int32 if (len(lengths) << bits) < 2**31 and len(values) < 2**31 else np.int64
+    values = (np.repeat(np.arange(len(lengths), dtype=dtype), lengths) << bits) | values.astype(dtype)
+    position = np.arange(len(values), dtype=dtype)
+    contributions = np.zeros(len(values), dtype=np.int64)
+    for b in range(bits - 1, -1, -1):
+        prefix = values >> (b + 1)
+        bit = (values >> b) & 1
+        counts = np.bincount(prefix)
+        group_start = np.cumsum(counts) - counts
+        ones = np.cumsum(bit, dtype=dtype)
+        ones_before = np.zeros(len(counts), dtype=dtype)
+        non_empty = counts > 0
+        ones_before[non_empty] = ones[group_start[non_empty]] - bit[group_start[non_empty]]
+        ones -= ones_before[prefix] # unos del grupo hasta la posición (incluida)
+        zero = bit == 0
+        contributions += np.where(zero, ones, 0)
+        if b == 0:
+            break
+        # Partición estable: los ceros del grupo al principio y los unos a continuación
+        ones_in_group = np.zeros(len(counts), dtype=dtype)
+        ones_in_group[non_empty] = ones[group_start[non_empty] + counts[non_empty] - 1]
+        target = np.where(zero, position - ones, (group_start + counts - ones_in_group - 1).astype(dtype)[prefix] + ones)
+        new_values = np.empty_like(values)
+        new_values[target] = values
+        values = new_values
+    inversions = np.zeros(len(lengths))
+    inversions[lengths > 0] = np.add.reduceat(contributions, (np.cumsum(lengths) - lengths)[lengths > 0])
+    return inversions
+
+# Funciones de correlación por método: todas reciben (x, y) y devuelven (r, p, n)
+CORRELATION_FUNCTIONS = {"pearson": pearson_batch, "spearman": spearman_batch, "kendall": kendall_batch}
+
+# Devuelve un dataframe indexado por columna con la correlación con el target ('corr'), su p-valor ('p_value')
+# y el número efectivo de observaciones usado en cada par ('n').
+# Con 'n_jobs' distinto de 1 los lotes de columnas se reparten entre procesos (ver run_column_batches).
+# Con 'cache_dir' los estadísticos se guardan y se reutilizan desde la caché persistente (ver cached_stats)
+def get_corr_stats_num(dataframe, target_col, columns=[], n_jobs=1, method="pearson", cache_dir=None):
+    if cache_dir is not None:
+        return cached_stats(cache_dir, dataframe, target_col, columns, ("corr", method),
+                            lambda missing: get_corr_stats_num(dataframe, target_col, missing, n_jobs, method))
+    with stage("estadisticos", n_columns=len(columns)) as st:
+        x = numeric_matrix(dataframe, columns)
+        y = column_values(dataframe, target_col)
+        if st is not None:
+            st.rows = len(y)
+        if use_parallel(x.shape[0], x.shape[1], n_jobs):
+            # En orden de columnas (Fortran) cada lote de columnas es un bloque contiguo de la memoria compartida
+            batches = run_column_batches(_corr_worker, {"x": np.asfortranarray(x), "y": y}, x.shape[1], n_jobs, method=method)
+            corrs, p_vals, n = (np.concatenate(parts) for parts in zip(*batches))
+        else:
+            corrs, p_vals, n = CORRELATION_FUNCTIONS[method](x, y)
+    return pd.DataFrame({"corr": corrs, "p_value": p_vals, "n": n}, index=pd.Index(columns, dtype=object))
+
+# Momentos por pares (pairwise-complete) de cada columna de 'x' con el target 'y' sobre un bloque de filas: número de
+# observaciones válidas en ambos ('n'), medias ('mean_x', 'mean_y'), sumas de cuadrados de las desviaciones ('m2_x', 'm2_y')
+# y co-momento ('c_xy'). Se combinan entre bloques con merge_pairwise_moments sin volver a leer los datos
+def pairwise_moments(x, y):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(x) & ~np.isnan(y)[:, np.newaxis]
+    n = valid.sum(axis=0).astype(np.float64)
+    x0 = np.where(valid, x, 0.0)
+    y0 = np.where(valid, y[:, np.newaxis], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_x = np.where(n > 0, x0.sum(axis=0) / n, 0.0)
+        mean_y = np.where(n > 0, y0.sum(axis=0) / n, 0.0)
+    dx = np.where(valid, x0 - mean_x, 0.0)
+    dy = np.where(valid, y0 - mean_y, 0.0)
+    return {"n": n, "mean_x": mean_x, "mean_y": mean_y,
+            "m2_x": (dx * dx).sum(axis=0), "m2_y": (dy * dy).sum(axis=0), "c_xy": (dx * dy).sum(axis=0)}
+
+# Combina los momentos por pares de dos bloques (fórmulas de Chan et al. para Welford en paralelo)
+def merge_pairwise_moments(a, b):
+    n = a["n"] + b["n"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w = np.where(n > 0, b["n"] / n, 0.0)
+    delta_x = b["mean_x"] - a["mean_x"]
+    delta_y = b["mean_y"] - a["mean_y"]
+    cross = a["n"] * w
+    return {"n": n,
+            "mean_x": a["mean_x"] + delta_x * w,
+            "mean_y": a["mean_y"] + delta_y * w,
+            "m2_x": a["m2_x"] + b["m2_x"] + delta_x * delta_x * cross,
+            "m2_y": a["m2_y"] + b["m2_y"] + delta_y * delta_y * cross,
+            "c_xy": a["c_xy"] + b["c_xy"] + delta_x * delta_y * cross}
+
+# Correlación de Pearson, p-valor y n de cada columna a partir de sus momentos por pares
+def pearson_from_moments(moments):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = moments["c_xy"] / np.sqrt(moments["m2_x"] * moments["m2_y"])
+    r = np.where(moments["n"] >= 2, np.clip(r, -1.0, 1.0), np.nan)
+    n = moments["n"].astype(np.int64)
+    return r, pearson_pvalues(r, n), n
+
 #Devuelve las columnas que correlan numéricamente
-def get_corr_columns_num(dataframe, target_col, columns=[], umbral_corr=0, pvalue=None):
+def get_corr_columns_num(dataframe, target_col, columns=[], umbral_corr=0, pvalue=None, n_jobs=1, method="pearson", cache_dir=None):
     result_columns = []
-    for col in columns:
-        corr, p_val = stats.pearsonr(dataframe[target_col].dropna(), dataframe[col].dropna())
+    if len(columns) == 0:
+        return result_columns
+
+    df_stats = get_corr_stats_num(dataframe, target_col, columns, n_jobs, method, cache_dir)
+    for col, corr, p_val in zip(columns, df_stats["corr"], df_stats["p_value"]):
         # Verifica que la correlación supera el umbral
         if abs(corr) > umbral_corr:
             # Si pvalue es None, añade la columna
@@ -86,4 +1329,896 @@ def get_corr_columns_num(dataframe, target_col, columns=[], umbral_corr=0, pvalu
             # Si pvalue no es None, verificar también la significación estadística
             elif p_val <= pvalue:
                 result_columns.append(col)
-    return result_columns
\ No newline at end of file
+    return result_columns
+
+# Prepara un bloque de columnas para calcular correlaciones entre features: valores centrados en la media de cada columna
+# (0 en los NaN) y máscara de validez, ambos en float32, y la norma de cada columna centrada. Si el bloque no tiene
+# missings la máscara no se guarda
+def _corr_block_arrays(dataframe, columns):
+    x = numeric_matrix(dataframe, columns)
+    valid = ~np.isnan(x)
+    mean = np.where(valid, x, 0.0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    centered = np.where(valid, x - mean, 0.0).astype(np.float32)
+    complete = bool(valid.all())
+    return {"centered": centered, "mask": None if complete else valid.astype(np.float32),
+            "norm": np.sqrt((centered.astype(np.float64) ** 2).sum(axis=0))}
+
+# Correlación de Pearson entre las columnas de dos bloques preparados con _corr_block_arrays (matriz a x b en float32).
+# Sin missings basta un producto matricial de las columnas centradas; con missings las sumas de cada par restringidas a
+# sus filas válidas en común se obtienen con productos matriciales entre valores y máscaras, como en _pearson_masked
+def _corr_between_blocks(a, b):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if a["mask"] is None and b["mask"] is None:
+            r = (a["centered"].T @ b["centered"]) / np.outer(a["norm"], b["norm"]).astype(np.float32)
+        else:
+            mask_a = a["mask"] if a["mask"] is not None else np.ones_like(a["centered"])
+            mask_b = b["mask"] if b["mask"] is not None else np.ones_like(b["centered"])
+            n = mask_a.T @ mask_b
+            sum_a = a["centered"].T @ mask_b
+            sum_b = mask_a.T @ b["centered"]
+            var_a = n * ((a["centered"] ** 2).T @ mask_b) - sum_a * sum_a
+            var_b = n * (mask_a.T @ (b["centered"] ** 2)) - sum_b * sum_b
+            r = (n * (a["centered"].T @ b["centered"]) - sum_a * sum_b) / np.sqrt(var_a * var_b)
+            r = np.where(n >= 2, r, np.nan)
+    return np.clip(r, -1.0, 1.0).astype(np.float32)
+
+# Número de columnas por bloque para que dos bloques preparados y su matriz de correlaciones quepan en 'memory_budget'
+def _corr_block_size(n_rows, memory_budget):
+    # Por columna: valores centrados y máscara de cada bloque (float32) más las temporales de los productos
+    return max(int(memory_budget // (4 * 6 * max(n_rows, 1))), 1)
+
+# Matriz de correlación de Pearson (float32) entre 'columns', calculada por bloques de columnas con productos matriciales
+# de modo que la memoria de trabajo no supere aproximadamente 'memory_budget' bytes además de la propia matriz.
+# Los NaN se tratan por pares (pairwise-complete)
+def corr_matrix_blocked(dataframe, columns, memory_budget=var.CORR_MATRIX_MEMORY_BUDGET):
+    k = len(columns)
+    matrix = np.empty((k, k), dtype=np.float32)
+    block = _corr_block_size(len(dataframe), memory_budget)
+    for i in range(0, k, block):
+        a = _corr_block_arrays(dataframe, columns[i:i + block])
+        matrix[i:i + block, i:i + block] = _corr_between_blocks(a, a)
+        for j in range(i + block, k, block):
+            b = _corr_block_arrays(dataframe, columns[j:j + block])
+            matrix[i:i + block, j:j + block] = _corr_between_blocks(a, b)
+            matrix[j:j + block, i:i + block] = matrix[i:i + block, j:j + block].T
+    np.fill_diagonal(matrix, 1.0)
+    return pd.DataFrame(matrix, index=pd.Index(columns, dtype=object), columns=pd.Index(columns, dtype=object))
+
+# Poda voraz de features redundantes: se recorren las columnas de mayor a menor 'scores' (por ejemplo, |correlación|
+# con el target) y se descarta cada columna cuya correlación en valor absoluto con alguna ya conservada supere 'umbral'.
+# Así, de cada grupo de features muy correladas entre sí se conserva la más relacionada con el target.
+# Las columnas candidatas se procesan por bloques y se comparan con las conservadas también por bloques, sin construir
+# la matriz de correlación completa. Devuelve las columnas conservadas en su orden original
+def prune_redundant(dataframe, columns, scores, umbral, memory_budget=var.CORR_MATRIX_MEMORY_BUDGET):
+    scores = np.nan_to_num(np.abs(np.asarray(scores, dtype=np.float64)), nan=-1.0)
+    ordered = [columns[i] for i in np.argsort(-scores, kind="stable")]
+    block = _corr_block_size(len(dataframe), memory_budget)
+    kept = []
+    for start in range(0, len(ordered), block):
+        candidates = ordered[start:start + block]
+        a = _corr_block_arrays(dataframe, candidates)
+        redundant = np.zeros(len(candidates), dtype=bool)
+        for j in range(0, len(kept), block):
+            r = _corr_between_blocks(a, _corr_block_arrays(dataframe, kept[j:j + block]))
+            redundant |= (np.abs(np.nan_to_num(r)) > umbral).any(axis=1)
+        # Dentro del bloque la decisión es secuencial: cada candidata solo compite con las conservadas antes que ella
+        r = np.abs(np.nan_to_num(_corr_between_blocks(a, a)))
+        kept_in_block = []
+        for i, col in enumerate(candidates):
+            if not redundant[i] and not (r[i, kept_in_block] > umbral).any():
+                kept_in_block.append(i)
+        kept.extend(candidates[i] for i in kept_in_block)
+    kept = set(kept)
+    return [col for col in columns if col in kept]
+
+# Discretiza una columna numérica en 'bins' intervalos iguales entre su mínimo y su máximo.
+# Devuelve el índice de intervalo de cada fila (-1 para los missings) y los bordes de los intervalos
+def bin_column(values, bins=var.DENSITY_BINS):
+    values = np.asarray(values, dtype=np.float64)
+    valid = np.isfinite(values)
+    codes = np.full(len(values), -1, dtype=np.intp)
+    if not valid.any():
+        return codes, np.linspace(0.0, 1.0, bins + 1)
+
+    low, high = values[valid].min(), values[valid].max()
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    codes[valid] = np.minimum(((values[valid] - low) / (high - low) * bins).astype(np.intp), bins - 1)
+    return codes, np.linspace(low, high, bins + 1)
+
+# Pre-agrega todos los pares de 'columns' en histogramas 2D de 'bins' x 'bins' celdas (y un histograma 1D por columna
+# para la diagonal). Cada columna se discretiza una sola vez y cada par se resuelve con un bincount, de modo que el
+# dibujo posterior solo depende del tamaño de la rejilla y no del número de filas.
+# Devuelve un diccionario {(columna_x, columna_y): recuentos} y otro {columna: bordes}
+def pair_histograms(dataframe, columns, bins=var.DENSITY_BINS):
+    codes = {}
+    edges = {}
+    for col in columns:
+        codes[col], edges[col] = bin_column(column_values(dataframe, col), bins)
+
+    hist = {}
+    for i, col_x in enumerate(columns):
+        hist[(col_x, col_x)] = np.bincount(codes[col_x][codes[col_x] >= 0], minlength=bins)
+        for col_y in columns[i + 1:]:
+            valid = (codes[col_x] >= 0) & (codes[col_y] >= 0)
+            counts = np.bincount(codes[col_x][valid] * bins + codes[col_y][valid], minlength=bins * bins).reshape(bins, bins)
+            hist[(col_x, col_y)] = counts
+            hist[(col_y, col_x)] = counts.T
+    return hist, edges
+
+# Pinta una rejilla tipo pairplot a partir de los histogramas de pair_histograms: imágenes de densidad (escala
+# logarítmica) fuera de la diagonal e histogramas en la diagonal. Devuelve la figura
+def plot_density_pairplot(dataframe, columns, bins=var.DENSITY_BINS):
+    hist, edges = pair_histograms(dataframe, columns, bins)
+    return draw_density_pairplot(hist, edges, columns)
+
+# Dibuja la rejilla de plot_density_pairplot a partir de los histogramas ya agregados
+def draw_density_pairplot(hist, edges, columns):
+    import matplotlib.pyplot as plt
+
+    k = len(columns)
+    fig, axes = plt.subplots(nrows=k, ncols=k, figsize=(2.5 * k, 2.5 * k), squeeze=False)
+    for i, col_y in enumerate(columns):
+        for j, col_x in enumerate(columns):
+            ax = axes[i][j]
+            if i == j:
+                ax.stairs(hist[(col_x, col_x)], edges[col_x], fill=True)
+            else:
+                ax.imshow(np.log1p(hist[(col_x, col_y)].T), origin="lower", aspect="auto", cmap="viridis",
+                          extent=(edges[col_x][0], edges[col_x][-1], edges[col_y][0], edges[col_y][-1]))
+            ax.set_xlabel(col_x if i == k - 1 else "")
+            ax.set_ylabel(col_y if j == 0 else "")
+    fig.tight_layout()
+    return fig
+
+# Histogramas y KDE del target para cada categoría de 'col', calculados en una sola pasada sobre los datos:
+# la columna se factoriza y el target se discretiza una vez en bins * var.KDE_GRID_FACTOR intervalos finos, y un único
+# bincount sobre el código combinado (categoría, intervalo) da los recuentos de todas las categorías a la vez.
+# Los histogramas de 'bins' intervalos se obtienen sumando intervalos finos y las KDE se calculan con binned_kde.
+# Devuelve un diccionario con las categorías ('categories'), los recuentos por categoría y bin ('counts'), los bordes de
+# los bins ('edges'), los puntos de la rejilla de las KDE ('grid') y las KDE en unidades de recuento por bin ('kde')
+def category_histograms(dataframe, col, target_col, bins=var.HIST_BINS):
+    fine_bins = bins * var.KDE_GRID_FACTOR
+    codes, categories = factorize_column(dataframe, col)
+    y = column_values(dataframe, target_col)
+    bin_codes, fine_edges = bin_column(y, fine_bins)
+
+    valid = (codes >= 0) & (bin_codes >= 0)
+    fine_counts = np.bincount(codes[valid] * fine_bins + bin_codes[valid], minlength=len(categories) * fine_bins)
+    fine_counts = fine_counts.reshape(len(categories), fine_bins).astype(np.float64)
+
+    # Ancho de banda por categoría con la regla de Scott (la de gaussian_kde) a partir de sus estadísticos suficientes
+    count, sums, sumsq = group_sufficient_stats(codes, y - np.nanmean(y), len(categories))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(np.maximum(sumsq - sums * sums / count, 0.0) / (count - 1))
+        bandwidth = std * count ** (-1 / 5)
+
+    fine_width = fine_edges[1] - fine_edges[0]
+    return {
+        "categories": categories,
+        "counts": fine_counts.reshape(len(categories), bins, var.KDE_GRID_FACTOR).sum(axis=2),
+        "edges": fine_edges[::var.KDE_GRID_FACTOR],
+        "grid": (fine_edges[:-1] + fine_edges[1:]) / 2,
+        # Escalamos la densidad a recuentos por bin del histograma, como hace seaborn con stat="count"
+        "kde": binned_kde(fine_counts, bandwidth / fine_width) * var.KDE_GRID_FACTOR,
+    }
+
+# KDE gaussiana de cada fila de 'counts' (un histograma fino por fila) mediante convolución por FFT.
+# 'sigma' es el ancho de banda de cada fila expresado en intervalos de la rejilla. Las filas sin ancho de banda válido
+# (menos de dos observaciones o varianza nula) devuelven NaN. El coste depende del tamaño de la rejilla, no de las filas
+def binned_kde(counts, sigma):
+    n_rows, grid_size = counts.shape
+    sigma = np.asarray(sigma, dtype=np.float64)
+    valid = np.isfinite(sigma) & (sigma > 0)
+
+    # Relleno con ceros para que la convolución circular no mezcle los extremos de la rejilla
+    pad = int(np.ceil(3 * sigma[valid].max())) if valid.any() else 0
+    size = grid_size + min(pad, 4 * grid_size)
+    freqs = np.fft.rfftfreq(size)
+    transfer = np.exp(-2 * (np.pi * freqs[np.newaxis, :] * np.where(valid, sigma, 0.0)[:, np.newaxis]) ** 2)
+    kde = np.fft.irfft(np.fft.rfft(counts, n=size, axis=1) * transfer, n=size, axis=1)[:, :grid_size]
+    kde = np.maximum(kde, 0.0)
+    kde[~valid] = np.nan
+    return kde
+
+# Pinta en 'ax' los histogramas y KDE precalculados (category_histograms) de las categorías de índices 'indices'
+def plot_category_histograms(ax, hist, indices, col):
+    for color, i in enumerate(indices):
+        ax.stairs(hist["counts"][i], hist["edges"], fill=True, alpha=0.4, color=f"C{color % 10}", label=str(hist["categories"][i]))
+        if not np.isnan(hist["kde"][i]).any():
+            ax.plot(hist["grid"], hist["kde"][i], color=f"C{color % 10}")
+    ax.legend(title=col)
+
+# Subconjunto de los histogramas de category_histograms con solo las categorías de índices 'indices'
+def subset_histograms(hist, indices):
+    indices = np.asarray(indices, dtype=np.intp)
+    return {"categories": hist["categories"][indices], "counts": hist["counts"][indices], "edges": hist["edges"],
+            "grid": hist["grid"], "kde": hist["kde"][indices]}
+
+# Dibuja una figura con 'n_axes' gráficos apilados y pinta en orden los paneles de 'panels' (diccionarios con los
+# histogramas de un subconjunto de categorías 'hist', la columna 'col' y un título opcional 'title'). Si hay más ejes
+# que paneles, los últimos quedan vacíos
+def draw_category_figure(panels, n_axes, figsize, xlabel, tight_layout=False):
+    import matplotlib.pyplot as plt
+
+    fig, axes = plt.subplots(nrows=n_axes, ncols=1, figsize=figsize, squeeze=False)
+    for ax, panel in zip(axes[:, 0], panels):
+        plot_category_histograms(ax, panel["hist"], range(len(panel["hist"]["categories"])), panel["col"])
+        if panel.get("title"):
+            ax.set_title(panel["title"])
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel("")
+    if tight_layout:
+        fig.tight_layout()
+    return fig
+
+# Pairplot de seaborn con todos los puntos de 'frame'. Devuelve la figura
+def draw_pairplot(frame):
+    import seaborn as sns
+    return sns.pairplot(frame).figure
+
+# Exportación de figuras sin bloquear: cada figura se describe con una función de dibujo de este módulo y sus
+# argumentos (histogramas ya agregados o las columnas a pintar), de modo que puede dibujarse en el propio proceso o
+# enviarse a un pool de procesos con el backend Agg que la guarda en disco mientras el proceso principal sigue
+
+# Pool de procesos de exportación y su número de procesos (se crea la primera vez y se reutiliza)
+_figure_pool = None
+_figure_pool_size = 0
+
+def _init_figure_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+def get_figure_pool(n_jobs=1):
+    global _figure_pool, _figure_pool_size
+    from concurrent.futures import ProcessPoolExecutor
+
+    n_jobs = resolve_n_jobs(n_jobs)
+    if _figure_pool is None or _figure_pool_size != n_jobs:
+        if _figure_pool is not None:
+            _figure_pool.shutdown(wait=False) # Las figuras ya enviadas terminan de guardarse
+        _figure_pool = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_figure_worker)
+        _figure_pool_size = n_jobs
+    return _figure_pool
+
+# Dibuja una figura en un proceso del pool, la guarda en 'path' y devuelve la ruta
+def _render_figure(draw, args, path):
+    import matplotlib.pyplot as plt
+
+    fig = draw(*args)
+    # Se guarda en un temporal y se renombra para que dos exportaciones a la misma ruta no mezclen sus ficheros
+    root, ext = os.path.splitext(path)
+    tmp_path = f"{root}.tmp-{os.getpid()}{ext}"
+    fig.savefig(tmp_path)
+    plt.close(fig)
+    os.replace(tmp_path, path)
+    return path
+
+# Ruta del fichero de una figura: 'name' sin caracteres problemáticos en un nombre de fichero y la extensión del formato
+def figure_path(output_dir, name, fig_format):
+    name = re.sub(r"[^\w.-]+", "_", name)
+    return os.path.join(output_dir, f"{name}.{fig_format}")
+
+# Entrega una figura según 'output': con "files" la envía al pool de exportación y devuelve un Future con la ruta del
+# fichero; con "show" o "figures" la dibuja en este proceso y devuelve la figura
+def export_figure(draw, args, output, path=None, n_jobs=1):
+    if output == "files":
+        return get_figure_pool(n_jobs).submit(_render_figure, draw, args, path)
+    return draw(*args)
+
+# Acumula en una sola pasada los estadísticos suficientes del target por grupo (recuento, suma y suma de cuadrados)
+# a partir de los códigos enteros de una columna factorizada. Los códigos negativos (missings) y los target nulos se ignoran
+def group_sufficient_stats(codes, y, n_groups):
+    valid = (codes >= 0) & ~np.isnan(y)
+    codes = codes[valid]
+    y = y[valid]
+    count = np.bincount(codes, minlength=n_groups).astype(np.float64)
+    sums = np.bincount(codes, weights=y, minlength=n_groups)
+    sumsq = np.bincount(codes, weights=y * y, minlength=n_groups)
+    return count, sums, sumsq
+
+# Convierte los estadísticos suficientes de cada grupo (recuento, suma y suma de cuadrados) en momentos (media y
+# suma de cuadrados de las desviaciones a la media del grupo)
+def stats_to_moments(count, sums, sumsq):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sums / count
+    return mean, np.maximum(sumsq - sums * mean, 0.0)
+
+# ANOVA de un factor (F y p-valor) calculado directamente a partir de los estadísticos suficientes de cada grupo
+def anova_from_stats(count, sums, sumsq):
+    return anova_from_moments(count, *stats_to_moments(count, sums, sumsq))
+
+# ANOVA de un factor a partir del recuento, la media y la suma de cuadrados de las desviaciones (m2) de cada grupo
+def anova_from_moments(count, mean, m2):
+    from scipy import stats
+    n_total = count.sum()
+    k = len(count)
+    grand_mean = (count * mean).sum() / n_total
+    ss_between = (count * (mean - grand_mean) ** 2).sum()
+    ss_within = m2.sum()
+    dof_between = k - 1
+    dof_within = n_total - k
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f = (ss_between / dof_between) / (ss_within / dof_within)
+    p = stats.f.sf(f, dof_between, dof_within) if dof_within > 0 else np.nan
+    return f, p
+
+# T de Student para dos muestras independientes con varianzas iguales (como ttest_ind), calculada a partir de los estadísticos suficientes
+def ttest_from_stats(count, sums, sumsq):
+    return ttest_from_moments(count, *stats_to_moments(count, sums, sumsq))
+
+# T de Student para dos muestras independientes a partir del recuento, la media y m2 de cada grupo
+def ttest_from_moments(count, mean, m2):
+    from scipy import stats
+    dof = count.sum() - 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pooled_var = m2.sum() / dof
+        t = (mean[0] - mean[1]) / np.sqrt(pooled_var * (1 / count[0] + 1 / count[1]))
+    p = 2 * stats.t.sf(abs(t), dof) if dof > 0 else np.nan
+    return t, p
+
+# Test de diferencia de medias del target entre grupos a partir de sus momentos: T de Student si hay dos grupos y
+# F de ANOVA si hay más. 'min_group_size' solo se aplica en el camino del ANOVA (más de dos grupos con datos), como hacía
+# plot_features_cat_regression: una columna binaria usa siempre sus dos grupos aunque uno tenga una sola observación
+def mean_diff_test(count, mean, m2, min_group_size=1):
+    groups = count >= 1
+    if groups.sum() > 2:
+        groups = count >= max(min_group_size, 1)
+    count, mean, m2 = count[groups], mean[groups], m2[groups]
+    if len(count) < 2:
+        stat, p = np.nan, np.nan
+    elif len(count) == 2:
+        stat, p = ttest_from_moments(count, mean, m2)
+    else:
+        stat, p = anova_from_moments(count, mean, m2)
+    return {"stat": stat, "p_value": p, "n": int(count.sum()), "n_groups": len(count)}
+
+# Momentos del target por categoría de una columna sobre un bloque de filas: categorías ('categories'), recuento ('count'),
+# media ('mean') y suma de cuadrados de las desviaciones a la media ('m2'). Se combinan con merge_category_moments
+def category_moments(values, y):
+    codes, categories = pd.factorize(values)
+    valid = (codes >= 0) & ~np.isnan(y)
+    codes = codes[valid]
+    y = y[valid]
+    count = np.bincount(codes, minlength=len(categories)).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.bincount(codes, weights=y, minlength=len(categories)) / count
+    mean = np.where(count > 0, mean, 0.0)
+    dev = y - mean[codes]
+    return {"categories": categories, "count": count, "mean": mean,
+            "m2": np.bincount(codes, weights=dev * dev, minlength=len(categories))}
+
+# Combina los momentos por categoría de dos bloques, alineando las categorías (las nuevas se añaden al final)
+def merge_category_moments(a, b):
+    categories = a["categories"].append(b["categories"].difference(a["categories"], sort=False))
+    merged = {"categories": categories}
+    position_a = categories.get_indexer(a["categories"])
+    position_b = categories.get_indexer(b["categories"])
+    count_a = np.zeros(len(categories))
+    count_b = np.zeros(len(categories))
+    mean_a = np.zeros(len(categories))
+    mean_b = np.zeros(len(categories))
+    m2 = np.zeros(len(categories))
+    count_a[position_a], mean_a[position_a] = a["count"], a["mean"]
+    count_b[position_b], mean_b[position_b] = b["count"], b["mean"]
+    m2[position_a] += a["m2"]
+    m2[position_b] += b["m2"]
+
+    count = count_a + count_b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        w = np.where(count > 0, count_b / count, 0.0)
+    delta = mean_b - mean_a
+    merged["count"] = count
+    merged["mean"] = mean_a + delta * w
+    merged["m2"] = m2 + delta * delta * count_a * w
+    return merged
+
+# Test de diferencia de medias del target entre las categorías de una columna ya factorizada ('codes', con -1 para los missings)
+def cat_test_from_codes(codes, n_groups, y, min_group_size=1):
+    count, sums, sumsq = group_sufficient_stats(codes, y, n_groups)
+    return mean_diff_test(count, *stats_to_moments(count, sums, sumsq), min_group_size)
+
+# Devuelve un dataframe indexado por columna con el estadístico del test de diferencia de medias del target entre las
+# categorías de cada columna ('stat': T de Student si hay dos grupos, F de ANOVA si hay más), su p-valor ('p_value'),
+# el número de observaciones ('n') y el número de grupos usados ('n_groups').
+# Cada columna se factoriza una única vez, de modo que su coste es una pasada sobre los datos independientemente del número de categorías.
+# En el ANOVA (más de dos grupos) solo se usan los grupos con al menos 'min_group_size' observaciones.
+# Con 'n_jobs' distinto de 1 los tests de los lotes de columnas se reparten entre procesos (ver run_column_batches).
+# Con 'cache_dir' los estadísticos se guardan y se reutilizan desde la caché persistente (ver cached_stats)
+def get_cat_stats(dataframe, target_col, columns=[], min_group_size=1, n_jobs=1, cache_dir=None):
+    if cache_dir is not None:
+        return cached_stats(cache_dir, dataframe, target_col, columns, ("cat", min_group_size),
+                            lambda missing: get_cat_stats(dataframe, target_col, missing, min_group_size, n_jobs))
+    # Centramos el target para reducir la cancelación numérica en las sumas de cuadrados
+    y = column_values(dataframe, target_col)
+    y = y - np.nanmean(y)
+
+    if use_parallel(len(y), len(columns), n_jobs):
+        with stage("estadisticos", rows=len(y), n_columns=len(columns)):
+            # Los códigos de todas las columnas se guardan en una matriz por columnas que se comparte con los procesos
+            codes = np.empty((len(y), len(columns)), dtype=np.int64, order="F")
+            n_groups = np.empty(len(columns), dtype=np.int64)
+            for i, col in enumerate(columns):
+                codes[:, i], uniques = factorize_column(dataframe, col)
+                n_groups[i] = len(uniques)
+            arrays = {"codes": codes, "n_groups": n_groups, "y": y}
+            batches = run_column_batches(_cat_test_worker, arrays, len(columns), n_jobs, min_group_size=min_group_size)
+            results = [result for batch in batches for result in batch]
+    else:
+        results = []
+        for col in columns:
+            with stage("estadisticos", column=col, rows=len(y), n_columns=1):
+                codes, uniques = factorize_column(dataframe, col)
+                results.append(cat_test_from_codes(codes, len(uniques), y, min_group_size))
+
+    return pd.DataFrame(results, index=pd.Index(columns, dtype=object), columns=["stat", "p_value", "n", "n_groups"])
+
+# Estadísticos suficientes de cada columna de 'x' (matriz filas x columnas) por clase del target ('codes', con -1 para
+# los missings) en una sola pasada matricial: las filas se ordenan por clase y np.add.reduceat suma a la vez todas las
+# columnas de cada clase. Los NaN de cada columna se descartan por separado.
+# Devuelve tres matrices (clases x columnas): recuento, suma y suma de cuadrados
+def class_sufficient_stats(x, codes, n_classes):
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim == 1:
+        x = x.reshape(-1, 1)
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    class_count = np.bincount(codes[order], minlength=n_classes)
+    present = np.flatnonzero(class_count)
+    starts = (np.cumsum(class_count) - class_count)[present]
+
+    x = x[order]
+    valid = ~np.isnan(x)
+    x = np.where(valid, x, 0.0)
+    count = np.zeros((n_classes, x.shape[1]))
+    sums = np.zeros((n_classes, x.shape[1]))
+    sumsq = np.zeros((n_classes, x.shape[1]))
+    if len(present):
+        count[present] = np.add.reduceat(valid, starts, axis=0, dtype=np.float64)
+        sums[present] = np.add.reduceat(x, starts, axis=0)
+        sumsq[present] = np.add.reduceat(x * x, starts, axis=0)
+    return count, sums, sumsq
+
+# ANOVA de un factor de todas las columnas a la vez a partir de las matrices (grupos x columnas) de estadísticos suficientes.
+# Solo se usan en cada columna los grupos con al menos 'min_group_size' observaciones.
+# Devuelve cuatro arrays con un valor por columna: F, p-valor, número de observaciones y número de grupos
+def anova_batch(count, sums, sumsq, min_group_size=1):
+    from scipy import stats
+
+    groups = count >= max(min_group_size, 1)
+    count = np.where(groups, count, 0.0)
+    mean, m2 = stats_to_moments(count, np.where(groups, sums, 0.0), np.where(groups, sumsq, 0.0))
+    mean = np.where(groups, mean, 0.0)
+    n_total = count.sum(axis=0)
+    n_groups = groups.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        grand_mean = (count * mean).sum(axis=0) / n_total
+        ss_between = (count * (mean - grand_mean) ** 2).sum(axis=0)
+        ss_within = np.where(groups, m2, 0.0).sum(axis=0)
+        dof_between = n_groups - 1
+        dof_within = n_total - n_groups
+        f = (ss_between / dof_between) / (ss_within / dof_within)
+        p = stats.f.sf(f, dof_between, dof_within)
+    valid = (dof_between > 0) & (dof_within > 0)
+    return np.where(valid, f, np.nan), np.where(valid, p, np.nan), n_total.astype(np.int64), n_groups
+
+# Devuelve un dataframe indexado por columna con la F del ANOVA de cada columna numérica entre las clases del target
+# ('stat'), su p-valor ('p_value'), el número de observaciones ('n') y el número de clases usadas ('n_groups').
+# Las columnas se centran en su media antes de acumular las sumas de cuadrados para reducir la cancelación numérica.
+# Con 'n_jobs' distinto de 1 los lotes de columnas se reparten entre procesos (ver run_column_batches)
+def get_class_stats_num(dataframe, target_col, columns=[], min_group_size=1, n_jobs=1):
+    with stage("estadisticos", n_columns=len(columns)) as st:
+        codes, classes = factorize_column(dataframe, target_col)
+        x = numeric_matrix(dataframe, columns)
+        if st is not None:
+            st.rows = len(codes)
+        x = x - np.nansum(x, axis=0) / np.maximum((~np.isnan(x)).sum(axis=0), 1)
+        if use_parallel(x.shape[0], x.shape[1], n_jobs):
+            arrays = {"x": np.asfortranarray(x), "codes": np.asarray(codes, dtype=np.int64)}
+            batches = run_column_batches(_anova_worker, arrays, x.shape[1], n_jobs, n_classes=len(classes), min_group_size=min_group_size)
+            f, p, n, n_groups = (np.concatenate(parts) for parts in zip(*batches))
+        else:
+            f, p, n, n_groups = anova_batch(*class_sufficient_stats(x, codes, len(classes)), min_group_size)
+    return pd.DataFrame({"stat": f, "p_value": p, "n": n, "n_groups": n_groups}, index=pd.Index(columns, dtype=object))
+
+# Test de independencia entre cada columna categórica y el target a partir de sus tablas de contingencia dispersas.
+# 'codes' es una matriz (filas x columnas) de códigos de categoría (-1 para los missings), 'n_categories' el número de
+# categorías de cada columna y 'target_codes'/'n_classes' lo mismo para el target. Para un lote de columnas se construye
+# un código combinado (columna, categoría, clase) y un único bincount (o np.unique si el espacio de códigos supera
+# var.CONTINGENCY_DENSE_CELLS) da las celdas no vacías de todas sus tablas, sin construir las tablas densas.
+# 'test' es "chi2" (chi-cuadrado de Pearson) o "g" (G-test de razón de verosimilitudes); con correction=True y un
+# grado de libertad se aplica la corrección de Yates, como en scipy.stats.chi2_contingency.
+# Devuelve arrays por columna: estadístico, p-valor, grados de libertad, número de observaciones y V de Cramér
+def contingency_batch(codes, n_categories, target_codes, n_classes, test="chi2", correction=True):
+    from scipy import stats
+
+    n_columns = codes.shape[1]
+    result = {name: np.full(n_columns, np.nan) for name in ("stat", "p_value", "dof", "n", "cramers_v")}
+    if n_columns == 0:
+        return tuple(result.values())
+
+    # Celdas no vacías: código combinado offset[columna] + categoría * n_classes + clase
+    sizes = np.asarray(n_categories, dtype=np.int64) * n_classes
+    offsets = np.cumsum(sizes) - sizes
+    valid = (codes >= 0) & (target_codes >= 0)[:, np.newaxis]
+    key = (offsets + codes * n_classes + target_codes[:, np.newaxis])[valid]
+    if sizes.sum() <= var.CONTINGENCY_DENSE_CELLS:
+        observed = np.bincount(key, minlength=sizes.sum())
+        cells = np.flatnonzero(observed)
+        observed = observed[cells].astype(np.float64)
+    else:
+        cells, observed = np.unique(key, return_counts=True)
+        observed = observed.astype(np.float64)
+    col = np.searchsorted(offsets, cells, side="right") - 1
+    category, target = np.divmod(cells - offsets[col], n_classes)
+
+    # Totales por fila (columna, categoría) y por columna de la tabla (columna, clase), y esperados de cada celda
+    row_offsets = np.cumsum(n_categories) - n_categories
+    row_total = np.bincount(row_offsets[col] + category, weights=observed, minlength=int(np.sum(n_categories)))
+    class_total = np.bincount(col * n_classes + target, weights=observed, minlength=n_columns * n_classes)
+    n = np.bincount(col, weights=observed, minlength=n_columns)
+    expected = row_total[row_offsets[col] + category] * class_total[col * n_classes + target] / n[col]
+
+    n_rows = np.bincount(np.repeat(np.arange(n_columns), n_categories)[row_total > 0], minlength=n_columns)
+    n_cols = (class_total.reshape(n_columns, n_classes) > 0).sum(axis=1)
+    # Sin observaciones válidas no hay filas ni columnas: dof = 0 y el test queda a NaN
+    dof = np.maximum(n_rows - 1, 0) * np.maximum(n_cols - 1, 0)
+
+    # Chi-cuadrado sin corrección: las celdas vacías aportan su esperado, que es n menos la suma de los esperados no vacíos
+    chi2 = np.bincount(col, weights=(observed - expected) ** 2 / expected, minlength=n_columns)
+    chi2 += n - np.bincount(col, weights=expected, minlength=n_columns)
+    if test == "g":
+        stat = 2 * np.bincount(col, weights=observed * np.log(observed / expected), minlength=n_columns)
+    else:
+        stat = chi2.copy()
+
+    if correction:
+        # Tablas 2x2 (un grado de libertad): corrección de Yates sobre la tabla completa, que es pequeña
+        for c in np.flatnonzero(dof == 1):
+            in_col = col == c
+            table = np.zeros((n_categories[c], n_classes))
+            table[category[in_col], target[in_col]] = observed[in_col]
+            table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+            table_expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / table.sum()
+            diff = table_expected - table
+            table = table + np.sign(diff) * np.minimum(0.5, np.abs(diff))
+            if test == "g":
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    stat[c] = 2 * np.where(table > 0, table * np.log(table / table_expected), 0.0).sum()
+            else:
+                stat[c] = ((table - table_expected) ** 2 / table_expected).sum()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cramers_v = np.sqrt(np.maximum(chi2, 0.0) / (n * np.minimum(n_rows - 1, n_cols - 1)))
+    ok = dof > 0
+    result["stat"] = np.where(ok, stat, np.nan)
+    result["p_value"] = np.where(ok, stats.chi2.sf(np.maximum(stat, 0.0), np.maximum(dof, 1)), np.nan)
+    result["dof"] = dof.astype(np.float64)
+    result["n"] = n
+    result["cramers_v"] = np.where(ok, cramers_v, np.nan)
+    return tuple(result.values())
+
+# Devuelve un dataframe indexado por columna con el test de independencia entre cada columna categórica y el target
+# ('stat', 'p_value' y grados de libertad 'dof'), el número de observaciones ('n') y la V de Cramér ('cramers_v').
+# Las columnas se factorizan una vez y se procesan por lotes de como mucho var.CONTINGENCY_BATCH_CELLS celdas.
+# Con 'n_jobs' distinto de 1 los lotes de columnas se reparten entre procesos (ver run_column_batches)
+def get_contingency_stats(dataframe, target_col, columns=[], test="chi2", correction=True, n_jobs=1):
+    with stage("estadisticos", n_columns=len(columns)) as st:
+        target_codes, classes = factorize_column(dataframe, target_col)
+        target_codes = np.asarray(target_codes, dtype=np.int64)
+        if st is not None:
+            st.rows = len(target_codes)
+        codes = np.empty((len(target_codes), len(columns)), dtype=np.int64, order="F")
+        n_categories = np.empty(len(columns), dtype=np.int64)
+        for i, col in enumerate(columns):
+            codes[:, i], uniques = factorize_column(dataframe, col)
+            n_categories[i] = len(uniques)
+        arrays = {"codes": codes, "n_categories": n_categories, "target_codes": target_codes}
+        kwargs = {"n_classes": len(classes), "test": test, "correction": correction}
+        if use_parallel(len(target_codes), len(columns), n_jobs):
+            batches = run_column_batches(_contingency_worker, arrays, len(columns), n_jobs, **kwargs)
+        else:
+            block = max(var.CONTINGENCY_BATCH_CELLS // max(len(target_codes), 1), 1)
+            batches = [_contingency_worker(arrays, start, min(start + block, len(columns)), **kwargs)
+                       for start in range(0, len(columns), block)]
+        stat, p, dof, n, cramers_v = (np.concatenate(parts) for parts in zip(*batches))
+    return pd.DataFrame({"stat": stat, "p_value": p, "dof": dof, "n": n, "cramers_v": cramers_v}, index=pd.Index(columns, dtype=object))
+
+# Discretiza cada columna de 'x' (matriz filas x columnas) en 'bins' intervalos de igual frecuencia. Los cuantiles de
+# todas las columnas se calculan a la vez; los bordes repetidos (columnas con muchos empates) se funden en un solo
+# intervalo. Devuelve la matriz de códigos por columnas (-1 para los NaN) y el número de intervalos de cada columna
+def quantile_bin_matrix(x, bins):
+    import warnings
+
+    x = np.asarray(x, dtype=np.float64)
+    if x.ndim == 1:
+        x = x.reshape(-1, 1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning) # Columnas sin ningún valor
+        edges = np.nanquantile(x, np.linspace(0, 1, bins + 1)[1:-1], axis=0).reshape(bins - 1, x.shape[1])
+    codes = np.empty(x.shape, dtype=np.int64, order="F")
+    n_bins = np.empty(x.shape[1], dtype=np.int64)
+    for i in range(x.shape[1]):
+        inner = np.unique(edges[:, i][np.isfinite(edges[:, i])])
+        codes[:, i] = np.searchsorted(inner, x[:, i], side="right")
+        codes[np.isnan(x[:, i]), i] = -1
+        n_bins[i] = len(inner) + 1
+    return codes, n_bins
+
+# Información mutua (en nats) entre cada columna de códigos y el target a partir de sus tablas de contingencia
+# dispersas: es el estadístico G dividido entre 2n. Devuelve (mi, n) con un valor por columna
+def mutual_information_batch(codes, n_categories, target_codes, n_classes):
+    g, _, dof, n, _ = contingency_batch(codes, n_categories, target_codes, n_classes, test="g", correction=False)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mi = np.where(dof > 0, g / (2 * n), 0.0)
+    return np.where(n > 0, np.maximum(mi, 0.0), np.nan), n
+
+# Devuelve un dataframe indexado por columna con la información mutua con el target ('mi', en nats), su p-valor por
+# permutaciones ('p_value', NaN si n_permutations=0) y el número de observaciones ('n').
+# El target y las columnas numéricas con más de 'bins' valores distintos se discretizan una vez por cuantiles (ver
+# quantile_bin_matrix); el resto de columnas se usan con sus códigos de categoría. La información mutua de todas las
+# columnas se calcula por lotes a partir de sus histogramas conjuntos (ver contingency_batch).
+# Con n_permutations > 0, el p-valor es (1 + nº de permutaciones del target con MI >= la observada) / (1 + n_permutations).
+# Con 'n_jobs' distinto de 1 los lotes de columnas se reparten entre procesos (ver run_column_batches)
+def get_mi_stats(dataframe, target_col, columns=[], bins=var.MI_BINS, n_permutations=0, random_state=None, n_jobs=1):
+    with stage("estadisticos", n_columns=len(columns)) as st:
+        profile = get_column_profile(dataframe)
+        target_codes, n_classes = quantile_bin_matrix(column_values(dataframe, target_col), bins)
+        target_codes = target_codes[:, 0]
+        if st is not None:
+            st.rows = len(target_codes)
+
+        codes = np.empty((len(target_codes), len(columns)), dtype=np.int64, order="F")
+        n_categories = np.empty(len(columns), dtype=np.int64)
+        numeric_columns = set(profile.numeric_columns())
+        binned = [i for i, col in enumerate(columns) if col in numeric_columns and profile.cardinality[col] > bins]
+        if binned:
+            codes[:, binned], n_categories[binned] = quantile_bin_matrix(numeric_matrix(dataframe, [columns[i] for i in binned]), bins)
+        for i in sorted(set(range(len(columns))) - set(binned)):
+            codes[:, i], uniques = factorize_column(dataframe, columns[i])
+            n_categories[i] = len(uniques)
+
+        # Semillas independientes por permutación: el resultado no depende de cómo se repartan los lotes
+        seeds = [int(seed.generate_state(1)[0]) for seed in np.random.SeedSequence(random_state).spawn(n_permutations)]
+        arrays = {"codes": codes, "n_categories": n_categories, "target_codes": target_codes}
+        kwargs = {"n_classes": int(n_classes[0]), "seeds": seeds}
+        if use_parallel(len(target_codes), len(columns), n_jobs):
+            batches = run_column_batches(_mi_worker, arrays, len(columns), n_jobs, **kwargs)
+        else:
+            block = max(var.CONTINGENCY_BATCH_CELLS // max(len(target_codes), 1), 1)
+            batches = [_mi_worker(arrays, start, min(start + block, len(columns)), **kwargs)
+                       for start in range(0, len(columns), block)]
+        mi, n, exceed = (np.concatenate(parts) for parts in zip(*batches))
+        p = (1 + exceed) / (1 + n_permutations) if n_permutations > 0 else np.full(len(columns), np.nan)
+    return pd.DataFrame({"mi": mi, "p_value": np.where(np.isnan(mi), np.nan, p), "n": n}, index=pd.Index(columns, dtype=object))
+
+# Pesos de las filas en un remuestreo de la selección por estabilidad: bootstrap (cada fila pesa tantas veces como sale en
+# n extracciones con reemplazamiento) o, con 'sample_fraction', submuestra sin reemplazamiento (pesos 0/1).
+# Un remuestreo con pesos equivale a recalcular los estadísticos sobre las filas repetidas, sin copiar el dataframe
+def resample_weights(n_rows, seed, sample_fraction=None):
+    rng = np.random.default_rng(seed)
+    if sample_fraction is None:
+        return np.bincount(rng.integers(0, n_rows, n_rows), minlength=n_rows).astype(np.float64)
+    weights = np.zeros(n_rows)
+    weights[rng.choice(n_rows, size=max(int(round(sample_fraction * n_rows)), 1), replace=False)] = 1.0
+    return weights
+
+# Selección por estabilidad: repite la selección de features sobre 'n_resamples' remuestreos de las filas y devuelve
+# cuántas veces se ha seleccionado cada columna. Los estadísticos de cada remuestreo se obtienen con pesos por fila:
+# para las numéricas (Pearson, |r| > umbral_corr y p-valor <= pvalue) con productos matriciales entre la matriz de pesos
+# de un grupo de remuestreos y los datos; para las categóricas (T de Student / ANOVA, p-valor < pvalue) con productos
+# entre los pesos y la codificación one-hot dispersa de cada columna. Los remuestreos se reparten entre procesos con
+# run_column_batches y cada uno usa su propia semilla, de modo que el resultado no depende de n_jobs
+def stability_counts(dataframe, target_col, num_columns, cat_columns, umbral_corr=0, pvalue=None, n_resamples=100,
+                     sample_fraction=None, random_state=None, min_group_size=1, n_jobs=1):
+    with stage("estadisticos", n_columns=len(num_columns) + len(cat_columns)) as st:
+        y = column_values(dataframe, target_col)
+        if st is not None:
+            st.rows = len(y)
+        y_valid = ~np.isnan(y)
+        y = np.where(y_valid, y - np.nanmean(y), 0.0)
+        seeds = [int(seed.generate_state(1)[0]) for seed in np.random.SeedSequence(random_state).spawn(n_resamples)]
+        kwargs = {"seeds": seeds, "sample_fraction": sample_fraction}
+        parallel = use_parallel(len(y), n_resamples * max(len(num_columns) + len(cat_columns), 1), n_jobs)
+
+        counts = {}
+        if num_columns:
+            x = numeric_matrix(dataframe, num_columns)
+            valid = ~np.isnan(x)
+            x = np.where(valid, x - np.where(valid, x, 0.0).sum(axis=0) / np.maximum(valid.sum(axis=0), 1), 0.0)
+            arrays = {"x": x, "y": y, "y_valid": y_valid.astype(np.float64)}
+            if not valid.all():
+                arrays["valid"] = valid.astype(np.float64)
+            worker_kwargs = dict(kwargs, umbral_corr=umbral_corr, pvalue=pvalue)
+            batches = (run_column_batches(_stability_num_worker, arrays, n_resamples, n_jobs, **worker_kwargs) if parallel
+                       else [_stability_num_worker(arrays, 0, n_resamples, **worker_kwargs)])
+            counts.update(zip(num_columns, np.sum(batches, axis=0)))
+        if cat_columns:
+            codes = np.empty((len(y), len(cat_columns)), dtype=np.int64, order="F")
+            n_groups = np.empty(len(cat_columns), dtype=np.int64)
+            for i, col in enumerate(cat_columns):
+                codes[:, i], uniques = factorize_column(dataframe, col)
+                n_groups[i] = len(uniques)
+            arrays = {"codes": codes, "n_groups": n_groups, "y": y, "y_valid": y_valid.astype(np.float64)}
+            worker_kwargs = dict(kwargs, pvalue=pvalue, min_group_size=min_group_size)
+            batches = (run_column_batches(_stability_cat_worker, arrays, n_resamples, n_jobs, **worker_kwargs) if parallel
+                       else [_stability_cat_worker(arrays, 0, n_resamples, **worker_kwargs)])
+            counts.update(zip(cat_columns, np.sum(batches, axis=0)))
+    return counts
+
+# Grupos de remuestreos [start, stop) de tamaño acotado por var.STABILITY_CHUNK_CELLS, con su matriz de pesos (remuestreos x filas)
+def _resample_chunks(n_rows, start, stop, seeds, sample_fraction):
+    chunk = max(var.STABILITY_CHUNK_CELLS // max(n_rows, 1), 1)
+    for first in range(start, stop, chunk):
+        yield np.stack([resample_weights(n_rows, seeds[i], sample_fraction) for i in range(first, min(first + chunk, stop))])
+
+# Veces que cada columna numérica supera el umbral de correlación (y el p-valor) en los remuestreos [start, stop).
+# 'x' e 'y' están centradas y con 0 en los NaN; 'valid' (solo si hay NaN en x) e 'y_valid' son las máscaras
+def _stability_num_worker(arrays, start, stop, seeds, sample_fraction=None, umbral_corr=0, pvalue=None):
+    x, y, y_valid, valid = arrays["x"], arrays["y"], arrays["y_valid"], arrays.get("valid")
+    x2 = x * x
+    selected = np.zeros(x.shape[1])
+    for weights in _resample_chunks(len(y), start, stop, seeds, sample_fraction):
+        weights = weights * y_valid
+        wy = weights * y
+        if valid is None:
+            n = weights.sum(axis=1)[:, np.newaxis]
+            sum_y = wy.sum(axis=1)[:, np.newaxis]
+            sum_yy = (wy * y).sum(axis=1)[:, np.newaxis]
+        else:
+            n = weights @ valid
+            sum_y = wy @ valid
+            sum_yy = (wy * y) @ valid
+        sum_x = weights @ x
+        sum_xx = weights @ x2
+        sum_xy = wy @ x
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = (n * sum_xy - sum_x * sum_y) / np.sqrt((n * sum_xx - sum_x * sum_x) * (n * sum_yy - sum_y * sum_y))
+        r = np.where(n >= 2, np.clip(r, -1.0, 1.0), np.nan)
+        chosen = np.abs(r) > umbral_corr
+        if pvalue is not None:
+            chosen &= pearson_pvalues(r, np.broadcast_to(n, r.shape)) <= pvalue
+        selected += chosen.sum(axis=0)
+    return selected
+
+# Veces que cada columna categórica tiene un p-valor menor que 'pvalue' en los remuestreos [start, stop). Los recuentos,
+# sumas y sumas de cuadrados del target por categoría de todos los remuestreos de un grupo salen de un único producto
+# entre la codificación one-hot dispersa de la columna y los pesos
+def _stability_cat_worker(arrays, start, stop, seeds, sample_fraction=None, pvalue=0.05, min_group_size=1):
+    from scipy import sparse
+
+    codes, n_groups, y, y_valid = arrays["codes"], arrays["n_groups"], arrays["y"], arrays["y_valid"]
+    n_rows = len(y)
+    one_hots = []
+    for i in range(codes.shape[1]):
+        rows = np.flatnonzero(codes[:, i] >= 0)
+        one_hots.append(sparse.csr_matrix((np.ones(len(rows)), (codes[rows, i], rows)), shape=(n_groups[i], n_rows)))
+    selected = np.zeros(codes.shape[1])
+    for weights in _resample_chunks(n_rows, start, stop, seeds, sample_fraction):
+        weights = weights * y_valid
+        wy = weights * y
+        stacked = np.ascontiguousarray(np.vstack([weights, wy, wy * y]).T) # filas x (3 * remuestreos)
+        for i, one_hot in enumerate(one_hots):
+            count, sums, sumsq = np.split(one_hot @ stacked, 3, axis=1) # categorías x remuestreos
+            selected[i] += (anova_batch(count, sums, sumsq, min_group_size)[1] < pvalue).sum()
+    return selected
+
+# Número de procesos a usar: n_jobs=None o 1 es serie, n_jobs=-1 usa todos los núcleos
+def resolve_n_jobs(n_jobs):
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max((os.cpu_count() or 1) + 1 + n_jobs, 1)
+    return max(n_jobs, 1)
+
+# Decide si merece la pena repartir las columnas entre procesos: las entradas pequeñas se calculan en serie
+# porque el coste de arrancar el pool y copiar a memoria compartida superaría la ganancia
+def use_parallel(n_rows, n_columns, n_jobs):
+    return resolve_n_jobs(n_jobs) > 1 and n_columns > 1 and n_rows * n_columns >= var.PARALLEL_MIN_CELLS
+
+# Reparte las columnas [0, n_columns) en lotes contiguos y ejecuta 'worker(arrays, start, stop, **kwargs)' sobre cada lote
+# en un pool de procesos. Los arrays se copian una vez a memoria compartida (SharedMemory) en lugar de serializar
+# el dataframe para cada proceso. Devuelve la lista de resultados en el orden de los lotes, de modo que el resultado
+# es determinista e igual al cálculo en serie
+def run_column_batches(worker, arrays, n_columns, n_jobs, **kwargs):
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    n_jobs = min(resolve_n_jobs(n_jobs), n_columns)
+    bounds = np.linspace(0, n_columns, min(n_columns, n_jobs * var.PARALLEL_BATCHES_PER_JOB) + 1).astype(int)
+
+    blocks = []
+    try:
+        descriptors = {}
+        for name, array in arrays.items():
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            blocks.append(block)
+            order = "F" if array.flags.f_contiguous and not array.flags.c_contiguous else "C"
+            np.ndarray(array.shape, array.dtype, buffer=block.buf, order=order)[...] = array
+            descriptors[name] = (block.name, array.shape, array.dtype.str, order)
+
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            futures = [pool.submit(_run_shared_batch, worker, descriptors, start, stop, kwargs)
+                       for start, stop in zip(bounds[:-1], bounds[1:])]
+            return [future.result() for future in futures]
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+# Punto de entrada de cada proceso del pool: se conecta a la memoria compartida, ejecuta el lote y se desconecta
+def _run_shared_batch(worker, descriptors, start, stop, kwargs):
+    from multiprocessing import shared_memory
+
+    blocks = []
+    try:
+        arrays = {}
+        for name, (block_name, shape, dtype, order) in descriptors.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            blocks.append(block)
+            arrays[name] = np.ndarray(shape, np.dtype(dtype), buffer=block.buf, order=order)
+        result = worker(arrays, start, stop, **kwargs)
+        del arrays
+        return result
+    finally:
+        for block in blocks:
+            block.close()
+
+def _corr_worker(arrays, start, stop, method="pearson"):
+    return CORRELATION_FUNCTIONS[method](arrays["x"][:, start:stop], arrays["y"])
+
+def _anova_worker(arrays, start, stop, n_classes, min_group_size=1):
+    return anova_batch(*class_sufficient_stats(arrays["x"][:, start:stop], arrays["codes"], n_classes), min_group_size)
+
+def _contingency_worker(arrays, start, stop, n_classes, test="chi2", correction=True):
+    return contingency_batch(arrays["codes"][:, start:stop], arrays["n_categories"][start:stop], arrays["target_codes"],
+                             n_classes, test, correction)
+
+def _mi_worker(arrays, start, stop, n_classes, seeds=()):
+    codes, n_categories, target_codes = arrays["codes"][:, start:stop], arrays["n_categories"][start:stop], arrays["target_codes"]
+    mi, n = mutual_information_batch(codes, n_categories, target_codes, n_classes)
+    exceed = np.zeros(len(mi))
+    for seed in seeds:
+        permuted = np.random.default_rng(seed).permutation(target_codes)
+        exceed += mutual_information_batch(codes, n_categories, permuted, n_classes)[0] >= mi * (1 - 1e-10)
+    return mi, n, exceed
+
+def _cat_test_worker(arrays, start, stop, min_group_size=1):
+    codes, n_groups, y = arrays["codes"], arrays["n_groups"], arrays["y"]
+    return [cat_test_from_codes(codes[:, i], n_groups[i], y, min_group_size) for i in range(start, stop)]
+
+# Ejecución por lotes (python -m toolbox_ML screen, ver toolbox_ML.main): perfilado y selección de features de varios
+# ficheros con un pool de procesos acotado. Cada fichero produce un manifiesto JSON con el resultado (y, en formato "parquet", las tablas
+# de describe_df y tipifica_variables en Parquet). El manifiesto guarda el tamaño y la fecha de modificación del fichero
+# y los parámetros usados, de modo que al relanzar solo se recalculan los ficheros que han cambiado
+
+# Rutas de los ficheros de informe de 'path': el nombre lleva un hash de la ruta absoluta para que dos ficheros con el
+# mismo nombre en directorios distintos no se pisen
+def report_paths(path, output_dir, fmt="json"):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = f"{stem}-{hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]}"
+    paths = {"manifest": os.path.join(output_dir, f"{name}.json")}
+    if fmt == "parquet":
+        paths["describe"] = os.path.join(output_dir, f"{name}.describe.parquet")
+        paths["tipos"] = os.path.join(output_dir, f"{name}.tipos.parquet")
+    return paths
+
+# Indica si el informe de 'path' existe y se generó con el fichero actual (mismo tamaño y fecha) y los mismos parámetros
+def report_is_current(path, paths, params):
+    if not all(os.path.exists(p) for p in paths.values()):
+        return False
+    try:
+        with open(paths["manifest"], encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return False
+    stat = os.stat(path)
+    source = manifest.get("source", {})
+    return (manifest.get("version") == var.REPORT_VERSION and manifest.get("params") == params
+            and source.get("size") == stat.st_size and source.get("mtime_ns") == stat.st_mtime_ns)
+
+# Lee un fichero CSV o Parquet como DataFrame de pandas
+def read_dataset(path):
+    if path.lower().endswith((".parquet", ".pq")):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
@@ -0,0 +1,31 @@
+"""
+Cardinalidad aproximada (CardinalityCounter / HyperLogLog) frente a nunique.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import functions as fnc
+import variables as var
+
+# Error relativo típico de HyperLogLog: 1.04 / sqrt(2**precision); se admiten 4 desviaciones
+TOLERANCE = 4 * 1.04 / np.sqrt(2 ** var.HLL_PRECISION)
+
+
+@pytest.mark.parametrize("dtype", [object, "str"])
+def test_hll_estimate_for_text_ids(dtype):
+    values = pd.Series([f"id_{i}" for i in range(300_000)] * 2).astype(dtype)
+    estimate = fnc.CardinalityCounter().add(values).count()
+    assert estimate == pytest.approx(values.nunique(), rel=TOLERANCE)
+
+
+def test_hll_estimate_for_numbers():
+    values = np.random.default_rng(0).integers(0, 150_000, size=500_000).astype(np.float64)
+    estimate = fnc.CardinalityCounter().add(values).count()
+    assert estimate == pytest.approx(len(np.unique(values)), rel=TOLERANCE)
+
+
+def test_small_cardinality_is_exact():
+    df = pd.DataFrame({"a": np.arange(200_000) % 7, "b": np.where(np.arange(200_000) % 3, "x", "y")})
+    profile = fnc.ColumnProfile.from_dataframe(df, approx=True)
+    assert profile.cardinality.to_dict() == df.nunique().to_dict()
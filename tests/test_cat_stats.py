@@ -0,0 +1,32 @@
+"""
+Tests de diferencia de medias entre categorías (fnc.get_cat_stats) frente a scipy.stats.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+import functions as fnc
+
+
+def test_binary_column_with_singleton_level_uses_ttest():
+    # min_group_size solo se aplica al ANOVA: una columna binaria con un nivel de una sola fila sigue usando la T de Student
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=50)
+    y[0] = 10.0
+    df = pd.DataFrame({"cat": ["raro"] + ["comun"] * 49, "y": y})
+    result = fnc.get_cat_stats(df, "y", ["cat"], min_group_size=2)
+    expected = stats.ttest_ind(y[:1], y[1:])
+    assert result.loc["cat", "n_groups"] == 2
+    assert result.loc["cat", "p_value"] == pytest.approx(expected.pvalue)
+
+
+def test_anova_drops_small_groups():
+    rng = np.random.default_rng(1)
+    y = rng.normal(size=60)
+    cat = np.array(["a"] * 30 + ["b"] * 29 + ["c"])
+    df = pd.DataFrame({"cat": cat, "y": y})
+    result = fnc.get_cat_stats(df, "y", ["cat"], min_group_size=2)
+    expected = stats.f_oneway(y[cat == "a"], y[cat == "b"])
+    assert result.loc["cat", "n_groups"] == 2
+    assert result.loc["cat", "p_value"] == pytest.approx(expected.pvalue)
@@ -0,0 +1,84 @@
+"""
+Tests de independencia vectorizados (fnc.contingency_batch) frente a scipy.stats.chi2_contingency, con el recuento
+denso (bincount) y el disperso (np.unique) de las celdas.
+"""
+import numpy as np
+import pytest
+from scipy import stats
+
+import functions as fnc
+import variables as var
+
+
+def _codes(seed, n=3000):
+    rng = np.random.default_rng(seed)
+    target = rng.integers(0, 3, size=n)
+    codes = np.column_stack([
+        rng.integers(0, 2, size=n),                           # binaria frente a target de 3 clases
+        (target + rng.integers(0, 2, size=n)) % 4,            # dependiente del target
+        rng.integers(0, 6, size=n),                           # con una categoría (5) que nunca aparece
+        rng.integers(0, 50, size=n),                          # muchas categorías, celdas vacías
+    ])
+    codes[codes[:, 2] == 5, 2] = 4
+    codes[rng.random(size=codes.shape) < 0.05] = -1           # nulos
+    target[rng.random(size=n) < 0.02] = -1
+    return codes, np.array([2, 4, 6, 50]), target, 3
+
+
+def _expected(codes, n_categories, target, n_classes, test, correction):
+    result = []
+    for c in range(codes.shape[1]):
+        valid = (codes[:, c] >= 0) & (target >= 0)
+        table = np.zeros((n_categories[c], n_classes))
+        np.add.at(table, (codes[valid, c], target[valid]), 1)
+        table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+        lambda_ = "log-likelihood" if test == "g" else None
+        stat, p, dof, _ = stats.chi2_contingency(table, correction=correction, lambda_=lambda_)
+        chi2 = stats.chi2_contingency(table, correction=False)[0]
+        cramers_v = np.sqrt(chi2 / (table.sum() * (min(table.shape) - 1)))
+        result.append((stat, p, dof, table.sum(), cramers_v))
+    return np.array(result).T
+
+
+@pytest.mark.parametrize("dense_cells", [var.CONTINGENCY_DENSE_CELLS, 0])
+@pytest.mark.parametrize("test", var.CONTINGENCY_TESTS)
+@pytest.mark.parametrize("correction", [True, False])
+def test_matches_scipy(monkeypatch, dense_cells, test, correction):
+    monkeypatch.setattr(var, "CONTINGENCY_DENSE_CELLS", dense_cells)
+    codes, n_categories, target, n_classes = _codes(0)
+    result = fnc.contingency_batch(codes, n_categories, target, n_classes, test=test, correction=correction)
+    for got, expected in zip(result, _expected(codes, n_categories, target, n_classes, test, correction)):
+        np.testing.assert_allclose(got, expected, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("dense_cells", [var.CONTINGENCY_DENSE_CELLS, 0])
+@pytest.mark.parametrize("test", var.CONTINGENCY_TESTS)
+def test_yates_on_2x2(monkeypatch, dense_cells, test):
+    monkeypatch.setattr(var, "CONTINGENCY_DENSE_CELLS", dense_cells)
+    rng = np.random.default_rng(1)
+    target = rng.integers(0, 2, size=200)
+    codes = np.column_stack([target ^ (rng.random(size=200) < 0.3), rng.integers(0, 2, size=200)])
+    result = fnc.contingency_batch(codes, np.array([2, 2]), target, 2, test=test, correction=True)
+    expected = _expected(codes, np.array([2, 2]), target, 2, test, True)
+    for got, exp in zip(result, expected):
+        np.testing.assert_allclose(got, exp, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("dense_cells", [var.CONTINGENCY_DENSE_CELLS, 0])
+def test_degenerate_tables_are_nan(monkeypatch, dense_cells):
+    monkeypatch.setattr(var, "CONTINGENCY_DENSE_CELLS", dense_cells)
+    target = np.array([0, 1, 0, 1, 0, 1])
+    codes = np.column_stack([np.zeros(6, dtype=np.int64), np.full(6, -1), np.array([0, 1, 0, 1, 1, 0])])
+    stat, p, dof, n, cramers_v = fnc.contingency_batch(codes, np.array([1, 3, 2]), target, 2)
+    assert np.isnan(stat[:2]).all() and np.isnan(p[:2]).all() and np.isnan(cramers_v[:2]).all()
+    np.testing.assert_array_equal(n, [6, 0, 6])
+    assert not np.isnan(p[2])
+
+
+def test_dense_and_sparse_agree(monkeypatch):
+    codes, n_categories, target, n_classes = _codes(2)
+    dense = fnc.contingency_batch(codes, n_categories, target, n_classes, test="g")
+    monkeypatch.setattr(var, "CONTINGENCY_DENSE_CELLS", 0)
+    sparse = fnc.contingency_batch(codes, n_categories, target, n_classes, test="g")
+    for a, b in zip(dense, sparse):
+        np.testing.assert_array_equal(a, b)
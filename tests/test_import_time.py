@@ -0,0 +1,24 @@
+"""
+Presupuesto de tiempo de importación de toolbox_ML (ver benchmarks/import_time.py).
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from import_time import IMPORT_TIME_BUDGET, measure_import
+
+
+def test_import_time_budget():
+    # La importación se mide en procesos nuevos, así que no le afecta lo que pytest ya tenga cargado
+    result = measure_import(runs=3)
+    assert result["seconds"] <= IMPORT_TIME_BUDGET, f"import toolbox_ML tarda {result['seconds']:.3f} s"
+
+
+def test_import_does_not_load_heavy_modules():
+    result = measure_import(runs=1)
+    for module in ("scipy", "seaborn", "matplotlib"):
+        assert module not in result["loaded"], f"import toolbox_ML carga {module}"
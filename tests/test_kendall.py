@@ -0,0 +1,95 @@
+"""
+Tau-b de Kendall vectorizada (fnc.kendall_batch) frente a scipy.stats.kendalltau (aproximación asintótica).
+"""
+import numpy as np
+import pytest
+from scipy import stats
+
+import functions as fnc
+import variables as var
+
+
+def _expected(x, y):
+    # scipy.stats.kendalltau sobre los pares sin NaN de cada columna
+    result = []
+    for col in x.T:
+        valid = ~np.isnan(col) & ~np.isnan(y)
+        if valid.sum() < 3:
+            result.append((np.nan, np.nan))
+            continue
+        tau, p = stats.kendalltau(col[valid], y[valid], method="asymptotic")
+        result.append((tau, p))
+    return np.array(result).T
+
+
+def _check(x, y):
+    tau, p, n = fnc.kendall_batch(x, y)
+    expected_tau, expected_p = _expected(x, y)
+    np.testing.assert_allclose(tau, expected_tau, rtol=1e-9, atol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(p, expected_p, rtol=1e-7, atol=1e-12, equal_nan=True)
+    np.testing.assert_array_equal(n, (~np.isnan(x) & ~np.isnan(y)[:, np.newaxis]).sum(axis=0))
+
+
+def test_continuous_columns():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=2000)
+    x = np.column_stack([y + rng.normal(scale=s, size=2000) for s in (0.1, 1.0, 10.0)] + [rng.normal(size=2000)])
+    _check(x, y)
+
+
+def test_ties_in_x_and_y():
+    rng = np.random.default_rng(1)
+    y = rng.integers(0, 20, size=1500).astype(np.float64)
+    x = np.column_stack([np.round(y / 3 + rng.normal(size=1500)), rng.integers(0, 2, size=1500), rng.integers(0, 500, size=1500)])
+    _check(x.astype(np.float64), y)
+
+
+def test_constant_columns():
+    rng = np.random.default_rng(2)
+    y = rng.normal(size=300)
+    x = np.column_stack([np.full(300, 4.0), rng.normal(size=300)])
+    _check(x, y)
+    tau, p, _ = fnc.kendall_batch(x, y)
+    assert np.isnan(tau[0]) and np.isnan(p[0])
+    # Target constante
+    tau, p, _ = fnc.kendall_batch(x, np.ones(300))
+    assert np.isnan(tau).all() and np.isnan(p).all()
+
+
+def test_nans_are_dropped_pairwise():
+    rng = np.random.default_rng(3)
+    y = rng.normal(size=1000)
+    x = np.column_stack([y + rng.normal(size=1000), rng.integers(0, 5, size=1000).astype(np.float64)])
+    x[rng.random(size=x.shape) < 0.2] = np.nan
+    y[rng.random(size=1000) < 0.1] = np.nan
+    _check(x, y)
+
+
+@pytest.mark.parametrize("n_valid", [0, 1, 2])
+def test_fewer_than_three_pairs(n_valid):
+    y = np.arange(6, dtype=np.float64)
+    x = np.full((6, 1), np.nan)
+    x[:n_valid, 0] = [5.0, 1.0][:n_valid]
+    tau, p, n = fnc.kendall_batch(x, y)
+    assert np.isnan(tau[0]) and np.isnan(p[0]) and n[0] == n_valid
+
+
+def test_blocks_of_columns(monkeypatch):
+    # Bloques de una sola columna: el resultado no depende del tamaño de bloque
+    monkeypatch.setattr(var, "RANK_BLOCK_CELLS", 10)
+    rng = np.random.default_rng(4)
+    y = rng.normal(size=400)
+    x = np.column_stack([y + rng.normal(size=400), np.round(rng.normal(size=400), 1)])
+    _check(x, y)
+
+
+def test_count_inversions():
+    rng = np.random.default_rng(5)
+    lengths = np.array([0, 1, 7, 300, 50])
+    values = np.concatenate([rng.integers(0, 40, size=length) for length in lengths])
+    expected, start = [], 0
+    for length in lengths:
+        segment = values[start:start + length]
+        expected.append(sum(int((segment[i] > segment[i + 1:]).sum()) for i in range(length)))
+        start += length
+    np.testing.assert_array_equal(fnc._count_inversions(values, lengths), expected)
@@ -0,0 +1,37 @@
+"""
+Caché de perfiles de columnas (fnc.get_column_profile): no debe devolver el perfil de otro dataset.
+"""
+import numpy as np
+import pandas as pd
+
+import toolbox_ML as toolbox
+
+
+def test_pandas_frames_with_same_shape_get_their_own_profile():
+    # Dataframes creados y liberados seguidos pueden reutilizar el mismo id
+    for i in range(200):
+        profile = toolbox.describe_df(pd.DataFrame({"a": np.arange(10.0) % (i % 5 + 2)}))
+        assert profile.loc["a", "UNIQUE_VALUES"] == i % 5 + 2
+
+
+def test_clear_profile_cache_after_inplace_edit():
+    df = pd.DataFrame({"a": np.arange(200_000, dtype=np.float64)})
+    assert toolbox.describe_df(df).loc["a", "MISSINGS (%)"] == 0
+    df.loc[5, "a"] = np.nan
+    toolbox.clear_profile_cache()
+    assert toolbox.describe_df(df).loc["a", "MISSINGS (%)"] > 0
+
+
+def test_arrow_tables_with_same_shape_get_their_own_profile():
+    pa = __import__("pytest").importorskip("pyarrow")
+    for i in range(200):
+        # La tabla se libera al terminar la llamada, así que la siguiente puede reutilizar su id
+        profile = toolbox.describe_df(pa.table({"a": np.arange(10.0) % (i % 5 + 2)}))
+        assert profile.loc["a", "UNIQUE_VALUES"] == i % 5 + 2
+
+
+def test_polars_frames_with_same_shape_get_their_own_profile():
+    pl = __import__("pytest").importorskip("polars")
+    for i in range(200):
+        profile = toolbox.describe_df(pl.DataFrame({"a": np.arange(10.0) % (i % 5 + 2)}))
+        assert profile.loc["a", "UNIQUE_VALUES"] == i % 5 + 2
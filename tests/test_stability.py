@@ -0,0 +1,21 @@
+"""
+Selección por estabilidad (get_features_stability).
+"""
+import os
+
+import pandas as pd
+
+import toolbox_ML as toolbox
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def test_stability_without_pvalue_with_categorical_columns():
+    df = pd.read_csv(os.path.join(DATA_DIR, "CarPrice_Assignment.csv"))
+    result = toolbox.get_features_stability(df, "price", umbral_corr=0.5, pvalue=None, n_resamples=5, random_state=0)
+    cat = result[result["tipo"] == "cat"]
+    assert len(cat) > 0
+    # Las categóricas se evalúan con pvalue=0.05, igual que con el valor por defecto
+    expected = toolbox.get_features_stability(df, "price", umbral_corr=0.5, pvalue=0.05, n_resamples=5, random_state=0)
+    pd.testing.assert_series_equal(cat["selecciones"].sort_index(),
+                                   expected.loc[expected["tipo"] == "cat", "selecciones"].sort_index())
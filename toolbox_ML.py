@@ -1,38 +1,59 @@
 import functions as fnc
 import variables as var
 
+import os
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-from scipy.stats import pearsonr, ttest_ind, f_oneway, stats
+# matplotlib, seaborn y scipy.stats no se importan aquí: las funciones que los necesitan los cargan
+# la primera vez que se usan, de modo que importar el módulo solo para seleccionar features es rápido
 
+@fnc.traced
 def describe_df(df):
     '''
     Devuelve el df con la descripción de tipo de dato por columna, 
     el tanto por ciento de valores nulos o missings, los valores 
     únicos y el porcentaje de cardinalidad.
     
+    El perfil de columnas se guarda en una caché en memoria que comparten describe_df,
+    tipifica_variables y las validaciones de las funciones de selección. Si se modifica
+    el dataframe en el sitio (p. ej. df.loc[5, "a"] = np.nan) sin cambiar su forma ni
+    sus tipos, hay que llamar a clear_profile_cache() para no obtener un perfil antiguo.
+
     Argumentos:
-    df (pd.DataFrame): Dataset del que se quiere extraer la descripción.
+    df (pd.DataFrame | pyarrow.Table | polars.DataFrame): Dataset del que se quiere extraer la descripción.
 
     Retorna:
     pd.DataFrame: Retorna en el mismo formato el información del argumento df.    
     '''
-    df_resultado = pd.DataFrame([df.dtypes, df.isna().sum()*100, df.nunique(), round(df.nunique()/len(df) * 100, 2)]) # Cardinaliad y porcentaje de variación de cardinalidad
-    df_resultado = df_resultado.rename(index= {0: "DATA_TYPE", 1: "MISSINGS (%)", 2: "UNIQUE_VALUES", 3: "CARDIN (%)"})
-    return df_resultado.T
+    return fnc.get_column_profile(df).describe()
 
 
-def tipifica_variables(df, umbral_categoria= var.UMBRAL_CATEGORIA, umbral_continua= var.UMBRAL_CONTINUA):
+def clear_profile_cache():
+    '''
+    Vacía la caché de perfiles de columnas que usan describe_df, tipifica_variables y las
+    validaciones de las funciones de selección. La caché identifica cada dataframe por su
+    identidad, su forma, sus tipos y una muestra de filas, así que no detecta todas las
+    modificaciones en el sitio: llámala después de modificar un dataframe ya perfilado.
+    '''
+    fnc.clear_profile_cache()
+
+
+@fnc.traced
+def tipifica_variables(df, umbral_categoria= var.UMBRAL_CATEGORIA, umbral_continua= var.UMBRAL_CONTINUA, approx=False):
     """
     Asigna un tipo a las variables de un dataframe en base a su cardinalidad y porcentaje de cardinalidad.
 
     Argumentos: 
-        df: el dataframe a analizar
+        df: el dataframe a analizar (pandas, tabla de pyarrow o DataFrame de polars)
         umbral_categoria (int): número de veces max. que tiene que aparecer una variable para ser categórica
         bral_continua (float): porcentaje mínimo de cardinalidad que tiene que tener una variable para ser numérica continua
+        approx (bool): si es True, la cardinalidad se estima con sketches HyperLogLog de memoria fija por columna
+            (exacta para cardinalidades pequeñas) en lugar de contar todos los valores únicos
+
+    El perfil se reutiliza desde la caché de describe_df: tras modificar el dataframe en el sitio
+    hay que llamar a clear_profile_cache().
 
     Retorna: 
         Un dataframe con los resultados con dos columnas: 
@@ -41,95 +62,224 @@ def tipifica_variables(df, umbral_categoria= var.UMBRAL_CATEGORIA, umbral_contin
         
     """
 
-    resultados = [] #se crea una lista vacía para meter los resultados
+    profile = fnc.get_column_profile(df, approx) #perfil de columnas (cardinalidad) calculado una sola vez por dataframe
+    return profile.tipifica(umbral_categoria, umbral_continua) #crea un dataframe con el tipo asignado a cada columna en base a su cardinalidad y porcentaje
 
-    for columna in df.columns: #coge cada columna en el dataframe
-        cardinalidad = df[columna].nunique() #calcula la cardinalidad 
-        porcentaje_cardinalidad = (cardinalidad / len(df))*100 #calcula el porcentaje 
+@fnc.traced
+def optimize_df(df, umbral_categoria= var.UMBRAL_CATEGORIA, umbral_continua= var.UMBRAL_CONTINUA, max_category_ratio= var.CATEGORY_MAX_RATIO):
+    """
+    Devuelve una copia del dataframe con tipos de dato compactos, elegidos a partir del tipo que
+    sugiere tipifica_variables para cada columna y sin perder información:
+        - Las columnas de texto Binarias o Categóricas pasan a 'category' (códigos enteros de 1 o 2 bytes).
+          Las de texto con más cardinalidad solo si tienen como mucho max_category_ratio valores únicos por fila.
+        - Las binarias cuyos valores son True/False pasan a bool.
+        - Los enteros se reducen al entero más pequeño que admite su rango y los decimales a float32
+          cuando todos sus valores se representan exactamente.
+    Las columnas numéricas siguen siendo numéricas, así que el resto de funciones del módulo devuelven
+    los mismos resultados sobre el dataframe optimizado, usando mucha menos memoria.
 
-        if cardinalidad == 2:
-            tipo = var.TIPO_BINARIA
-            #tipo = "Binaria"
+    Argumentos:
+        df: el dataframe a optimizar (pandas, tabla de pyarrow o DataFrame de polars)
+        umbral_categoria (int): umbral de categoría de tipifica_variables
+        umbral_continua (float): umbral de variable continua de tipifica_variables
+        max_category_ratio (float): proporción máxima de valores únicos para convertir a 'category'
+            una columna de texto que no es Binaria ni Categórica
 
-        elif (cardinalidad < umbral_categoria) and (cardinalidad != 2):
-            tipo = var.TIPO_CATEGORICA
-            #"Categórica"
+    Retorna:
+        pd.DataFrame: dataframe de pandas con los tipos optimizados.
+    """
 
-        elif porcentaje_cardinalidad >= umbral_continua: #mayor que umbral categoria, mayor o igual que umbral continua
-            tipo = var.TIPO_NUM_CONTINUA
-            #"Numérica Continua"
+    profile = fnc.get_column_profile(df)
+    tipos = profile.tipos(umbral_categoria, umbral_continua)
+    data = fnc.to_pandas(df, fnc.frame_columns(df))
+    with fnc.stage("optimizacion", rows=len(data), n_columns=len(tipos)):
+        return pd.DataFrame({col: fnc.compact_column(data[col], tipos[col], profile.cardinality[col], max_category_ratio)
+                             for col in data.columns}, index=data.index)
 
-        else:
-            tipo = var.TIPO_NUM_DISCRETA #el porcentaje de cardinalidad es menor que umbral continua 
-            #"Numérica Discreta"
-        
-        resultados.append({"variable": columna, "tipo": tipo}) #mete en la lista de resultados la columna y el tipo que se le asigna 
+@fnc.traced
+def describe_df_chunked(source, chunksize=None, memory_budget=var.CHUNK_MEMORY_BUDGET, approx=False):
+    '''
+    Versión por bloques de describe_df para datasets que no caben en memoria. Lee el dataset
+    bloque a bloque y acumula los nulos, el tipo de dato y los valores únicos de cada columna.
 
-    return pd.DataFrame(resultados) #crea un dataframe con la lista de resultados 
+    Argumentos:
+    source (str | iterable): ruta de un CSV o iterable de DataFrames (bloques) del dataset.
+    chunksize (int): número de filas por bloque al leer un CSV. Por defecto se calcula a partir de memory_budget.
+    memory_budget (int): memoria máxima aproximada en bytes. La cardinalidad se cuenta de forma exacta
+        mientras quepa en el presupuesto; por encima se reporta la cota alcanzada.
+    approx (bool): si es True, la cardinalidad se estima con sketches HyperLogLog (exacta para cardinalidades pequeñas).
+
+    Retorna:
+    pd.DataFrame: la misma tabla que describe_df.
+    '''
+    return fnc.profile_from_chunks(source, chunksize, memory_budget, approx=approx).describe()
+
+
+@fnc.traced
+def tipifica_variables_chunked(source, umbral_categoria= var.UMBRAL_CATEGORIA, umbral_continua= var.UMBRAL_CONTINUA, chunksize=None, memory_budget=var.CHUNK_MEMORY_BUDGET, approx=False):
+    """
+    Versión por bloques de tipifica_variables para datasets que no caben en memoria.
+
+    Argumentos: 
+        source: ruta de un CSV o iterable de DataFrames (bloques) del dataset
+        umbral_categoria (int): número de veces max. que tiene que aparecer una variable para ser categórica
+        umbral_continua (float): porcentaje mínimo de cardinalidad que tiene que tener una variable para ser numérica continua
+        chunksize (int): número de filas por bloque al leer un CSV. Por defecto se calcula a partir de memory_budget
+        memory_budget (int): memoria máxima aproximada en bytes
+        approx (bool): si es True, la cardinalidad se estima con sketches HyperLogLog (exacta para cardinalidades pequeñas)
+
+    Retorna: 
+        El mismo dataframe que tipifica_variables
+    """
+    profile = fnc.profile_from_chunks(source, chunksize, memory_budget, approx=approx)
+    return profile.tipifica(umbral_categoria, umbral_continua)
 
-def get_features_num_regression(df, target_col, umbral_corr, pvalue=None):
+@fnc.traced
+def load_csv_cached(path, cache_dir=None, chunksize=None, memory_budget=var.CHUNK_MEMORY_BUDGET):
+    '''
+    Carga un CSV a través de una caché columnar en disco para analizar el mismo dataset varias veces sin
+    volver a parsearlo. La primera llamada convierte el CSV por bloques: las columnas numéricas se guardan
+    como arrays binarios y las de texto codificadas como diccionario, junto con el perfil de columnas
+    (nulos, tipos y cardinalidad). Las siguientes llamadas abren esos ficheros como memoria mapeada.
+    La caché se regenera automáticamente si el CSV cambia de tamaño o de fecha de modificación.
+
+    Argumentos:
+    path (str): ruta del CSV.
+    cache_dir (str): directorio de la caché. Por defecto, '.toolbox_cache' junto al CSV.
+    chunksize (int): número de filas por bloque al crear la caché. Por defecto se calcula a partir de memory_budget.
+    memory_budget (int): memoria máxima aproximada en bytes al crear la caché.
+
+    Retorna:
+    fnc.CachedFrame: dataset que aceptan directamente describe_df, tipifica_variables y las funciones
+        get_features_*. Su método to_pandas(columns) devuelve un DataFrame igual al de pd.read_csv.
+    '''
+    return fnc.load_csv_cache(path, cache_dir, chunksize, memory_budget)
+
+
+def trace_run(memory=False, callback=None):
+    '''
+    Context manager que instrumenta las funciones de la toolbox ejecutadas dentro del bloque. Registra
+    cada llamada pública y sus etapas (validacion, tipificacion, estadisticos y grafico; por columna
+    cuando el cálculo se hace columna a columna) con su tiempo de reloj, filas recorridas y pico de
+    memoria reservada, además de los mensajes mostrados al usuario. Fuera de un bloque trace_run la
+    instrumentación no tiene coste apreciable.
+
+    Uso:
+        with trace_run(memory=True) as report:
+            get_features_num_regression(df, "price", 0.3, 0.05)
+        report.summary()
+
+    Argumentos:
+    memory (bool): si es True mide también el pico de memoria con tracemalloc (ralentiza la ejecución).
+    callback (callable): función a la que se pasa cada registro (dict) al terminar su etapa.
+
+    Retorna:
+    fnc.RunReport: informe con los registros ('records', to_dataframe(), summary()) y los mensajes ('messages').
+        Los registros se emiten también como logs de nivel DEBUG del logger "toolbox_ML".
+    '''
+    return fnc.trace(memory, callback)
+
+
+def clear_stats_cache(cache_dir, df=None, target_col=None):
+    '''
+    Borra entradas de la caché persistente de estadísticos usada por get_features_num_regression y
+    get_features_cat_regression con el parámetro cache_dir.
+
+    Argumentos:
+    cache_dir (str): directorio de la caché.
+    df (pd.DataFrame | pyarrow.Table | polars.DataFrame, opcional): si se indica, solo se borran las entradas de este dataset.
+    target_col (str, opcional): junto con df, solo se borran las entradas de ese dataset con este target.
+
+    Retorna:
+    int: número de entradas borradas.
+    '''
+    return fnc.clear_stats_cache(cache_dir, df, target_col)
+
+
+@fnc.traced
+def get_features_num_regression(df, target_col, umbral_corr, pvalue=None, n_jobs=1, method="pearson", umbral_redundancia=None, cache_dir=None):
     '''
     Selecciona features numéricas basadas en su correlación con la variable target.
     La variable target debe ser numerica con alta cardinalidad.
     
     Args:
-        df (pandas.DataFrame): DataFrame de entrada
+        df (pandas.DataFrame | pyarrow.Table | polars.DataFrame): DataFrame de entrada
         target_col (str): Nombre de la columna target
         umbral_corr (float): Umbral de correlación (valor absoluto) entre 0 y 1
         pvalue (float, optional): Nivel de significación para el test de hipótesis
+        n_jobs (int, optional): Número de procesos entre los que repartir las columnas (-1 para usar todos los núcleos).
+            Con datasets pequeños el cálculo se hace en serie
+        method (str, optional): Coeficiente de correlación: "pearson" (por defecto, relación lineal), "spearman"
+            (Pearson sobre los rangos) o "kendall" (tau-b, con el algoritmo O(n log n) de Knight). Los dos últimos
+            detectan relaciones monótonas no lineales
+        umbral_redundancia (float, optional): Si se indica (entre 0 y 1), de cada grupo de features seleccionadas con
+            correlación de Pearson entre sí mayor que este valor (en valor absoluto) solo se conserva la más correlada
+            con el target
+        cache_dir (str, optional): Directorio de la caché persistente de estadísticos. Si se indica, la correlación,
+            el p-valor y el número de observaciones de cada columna se guardan ahí indexados por el contenido del
+            dataset y el target, y las llamadas posteriores con otros umbrales se responden sin recorrer los datos
+            (ver clear_stats_cache)
         
     Returns:
         Lista de columnas que cumplen los criterios o None si hay error
     '''
-    ## Validaciones de entrada
-    # Verifica que target_col exista en el DataFrame y sea una cadena
-    if target_col not in df.columns:
-        print(f"Error: no encuentro {target_col} en el dataframe.")
-        return None
-    if not isinstance(target_col, str):
-        print(f"Error: {target_col} debe ser una cadena de texto")
-        return None
-    # Verifica que la columna target_col sea numérica y con alta cardinalidad
-    if not np.issubdtype(df[target_col].dtype, np.number):  #np.issubdtype comprueba si el tipo de datos de la columna es un subtipo de np.number (incluyendo enteros y float).
-        print(f"Error: La columna '{target_col}' debe ser numérica.")
-        return None
-    n_unique = df[target_col].nunique()
-    if n_unique < var.UMBRAL_CONTINUA:  # umbral arbitrario para considerar alta cardinalidad
-        print(f"Error: La columna {target_col} debe tener alta cardinalidad")
-        return None
-    
-    # Verifica que umbral_corr está entre 0 y 1
-    if not (0 <= umbral_corr <= 1):
-        print("Error: El umbral de correlación debe estar entre 0 y 1.")
-        return None
-    
-    # Validación de pvalue si está presente
-    if pvalue is not None and not 0 <= pvalue <= 1:
-        print("El valor p debe estar entre 0 y 1.")
-        return None
-    
+    with fnc.stage("validacion"):
+        ## Validaciones de entrada
+        # Verifica que target_col exista en el DataFrame y sea una cadena
+        if target_col not in fnc.frame_columns(df):
+            fnc.report_message(f"Error: no encuentro {target_col} en el dataframe.")
+            return None
+        if not isinstance(target_col, str):
+            fnc.report_message(f"Error: {target_col} debe ser una cadena de texto")
+            return None
+        # Verifica que la columna target_col sea numérica y con alta cardinalidad
+        profile = fnc.get_column_profile(df)
+        if target_col not in profile.numeric_columns():  # columnas de tipo numérico (enteros y float, sin booleanos)
+            fnc.report_message(f"Error: La columna '{target_col}' debe ser numérica.")
+            return None
+        n_unique = profile.cardinality[target_col]
+        if n_unique < var.UMBRAL_CONTINUA:  # umbral arbitrario para considerar alta cardinalidad
+            fnc.report_message(f"Error: La columna {target_col} debe tener alta cardinalidad")
+            return None
+
+        # Verifica que umbral_corr está entre 0 y 1
+        if not (0 <= umbral_corr <= 1):
+            fnc.report_message("Error: El umbral de correlación debe estar entre 0 y 1.")
+            return None
+
+        # Validación de pvalue si está presente
+        if pvalue is not None and not 0 <= pvalue <= 1:
+            fnc.report_message("El valor p debe estar entre 0 y 1.")
+            return None
 
-    # Lista para almacenar las columnas que cumplen con los criterios
-    features_num = []
+        # Verifica que el método de correlación existe
+        if method not in var.CORR_METHODS:
+            fnc.report_message(f"Error: El método de correlación debe ser uno de {var.CORR_METHODS}.")
+            return None
+
+        # Verifica que umbral_redundancia está entre 0 y 1
+        if umbral_redundancia is not None and not 0 <= umbral_redundancia <= 1:
+            fnc.report_message("Error: El umbral de redundancia debe estar entre 0 y 1.")
+            return None
 
     # Iterar sobre todas las columnas numéricas del dataframe 
     # excluiendo la target y las numericas con cardinalidad baja que pueden ser consideradas categoricas 
-    for col in df.select_dtypes(include=np.number).columns:
-        if col != target_col and df[col].nunique() >= var.UMBRAL_CONTINUA:
-            corr, p_val = stats.pearsonr(df[target_col].dropna(), df[col].dropna())
-            # Verifica que la correlación supera el umbral
-            if abs(corr) > umbral_corr:
-                # Si pvalue es None, añade la columna
-                if pvalue is None:
-                    features_num.append(col)
-                # Si pvalue no es None, verificar también la significación estadística
-                elif p_val <= pvalue:
-                    features_num.append(col)
-    
+    candidate_columns = [col for col in profile.numeric_columns()
+                         if col != target_col and profile.cardinality[col] >= var.UMBRAL_CONTINUA]
+
+    # Correlación y p-valor de todas las columnas candidatas en una sola pasada
+    features_num = fnc.get_corr_columns_num(df, target_col, candidate_columns, umbral_corr, pvalue, n_jobs, method, cache_dir)
+
+    # Poda de las features seleccionadas muy correladas entre sí
+    if umbral_redundancia is not None and len(features_num) > 1:
+        with fnc.stage("redundancia", n_columns=len(features_num)):
+            scores = fnc.get_corr_stats_num(df, target_col, features_num, n_jobs, method, cache_dir)["corr"]
+            features_num = fnc.prune_redundant(df, features_num, scores, umbral_redundancia)
 
     return features_num
 
-def plot_features_num_regression(dataframe, target_col="", columns=[], umbral_corr=0, pvalue=None, max_pairplot_column=5):
+@fnc.traced
+def plot_features_num_regression(dataframe, target_col="", columns=[], umbral_corr=0, pvalue=None, max_pairplot_column=5, render="auto", bins=var.DENSITY_BINS, method="pearson", return_corr_matrix=False, output="show", output_dir=var.FIGURE_DIR, fig_format="png", n_jobs=1):
     """
         Función que analiza la correlación de variables numéricas con la variable target. En el caso de que haya variables correladas
         pintará un pairplot con la comparativa de cada una de ellas.
@@ -142,11 +292,26 @@ def plot_features_num_regression(dataframe, target_col="", columns=[], umbral_co
             > umbral_corr: Umbral a partir del cual una columna se va a comparar con el target. Por defecto es 0
             > pvalue: Nivel de significación para el test de hipótesis
             > max_pairplot_column: Número de columnas a pintar. Debe ser mayor o igual a 2. Se define 5 como valor por defecto
+            > render: Modo de dibujo. "points" pinta el pairplot de seaborn con todos los puntos, "density" pinta cada par como
+                        un histograma 2D pre-agregado (el tiempo depende de la rejilla y no del número de filas) y "auto"
+                        (por defecto) usa "density" cuando el dataframe tiene más de var.DENSITY_MIN_ROWS filas
+            > bins: Número de intervalos por eje de los histogramas del modo "density". Por defecto var.DENSITY_BINS
+            > method: Coeficiente de correlación: "pearson" (por defecto), "spearman" o "kendall"
+            > return_corr_matrix: Si es True, devuelve también la matriz de correlación. Por defecto False
+            > output: Qué hacer con las figuras. "show" (por defecto) las pinta como siempre, "figures" las devuelve sin
+                        mostrarlas y "files" las guarda en 'output_dir' desde procesos en segundo plano (backend Agg), sin
+                        esperar a que terminen: la función retorna en cuanto tiene las columnas seleccionadas
+            > output_dir: Directorio donde se guardan las figuras con output="files". Por defecto var.FIGURE_DIR
+            > fig_format: Formato de los ficheros con output="files": "png" (por defecto) o "svg"
+            > n_jobs: Número de procesos para la correlación y para guardar las figuras (-1 para usar todos los núcleos)
 
         Retorna:
             > Parametro 1: Lista de las columnas que tienen correlación por encima de 'umbral_corr' con la variable target. En el caso de que 
                         haya algún error, se devuelve 'None'
-            > Parametro 2: Matriz de correlación con las variables seleccionadas
+            > Parametro 2 (solo con return_corr_matrix=True): Matriz de correlación de Pearson (float32) entre el target y
+                        las variables seleccionadas, calculada por bloques (ver fnc.corr_matrix_blocked)
+            > Último parámetro (solo con output="figures" o "files"): lista con las figuras o, con "files", con un
+                        concurrent.futures.Future por figura que se resuelve con la ruta del fichero guardado
 
     """
     final_columns = columns
@@ -163,31 +328,72 @@ def plot_features_num_regression(dataframe, target_col="", columns=[], umbral_co
 
     # Comprobamos si finalmente hay columnas a analizar
     if len(final_columns) == 0:
-        print("No se han especificado columnas en el parámetro 'columns' y el set de datos no contiene ninguna columna numérica (diferente al target)")
+        fnc.report_message("No se han especificado columnas en el parámetro 'columns' y el set de datos no contiene ninguna columna numérica (diferente al target)")
         return None
 
     # Verificamos que el número máximo de columnas a pintar es mayor que 2
     if max_pairplot_column < 2:
-        print("El valor de la variable 'max_pairplot_column' debe ser mayor o igual a 2")
+        fnc.report_message("El valor de la variable 'max_pairplot_column' debe ser mayor o igual a 2")
+        return None
+
+    if render not in ("auto", "points", "density"):
+        fnc.report_message("El valor de la variable 'render' debe ser 'auto', 'points' o 'density'")
+        return None
+    if render == "auto":
+        render = "density" if len(dataframe) > var.DENSITY_MIN_ROWS else "points"
+
+    if method not in var.CORR_METHODS:
+        fnc.report_message(f"Error: El método de correlación debe ser uno de {var.CORR_METHODS}.")
+        return None
+
+    if output not in var.PLOT_OUTPUTS:
+        fnc.report_message(f"El valor de la variable 'output' debe ser uno de {var.PLOT_OUTPUTS}")
+        return None
+    if fig_format not in var.FIGURE_FORMATS:
+        fnc.report_message(f"El valor de la variable 'fig_format' debe ser uno de {var.FIGURE_FORMATS}")
         return None
     
-    corr_columns = fnc.get_corr_columns_num(dataframe, target_col, final_columns, umbral_corr, pvalue)
+    corr_columns = fnc.get_corr_columns_num(dataframe, target_col, final_columns, umbral_corr, pvalue, n_jobs=n_jobs, method=method)
 
     # Comprobamos si hay columnas a analizar que correlan con el umbral especificado
     if len(corr_columns) == 0:
-        print("No se han encontrado columnas de correlación con los criterios especificados")
+        fnc.report_message("No se han encontrado columnas de correlación con los criterios especificados")
         return None
     else:
-        #Pintamos el pairplot
-        sns.set_style = var.SNS_STYLE
+        #Pintamos el pairplot (con output="files" se dibuja en los procesos de exportación)
+        if output == "files":
+            os.makedirs(output_dir, exist_ok=True)
+        else:
+            import seaborn as sns
+            sns.set_style = var.SNS_STYLE
+        figures = []
         paint_columns = corr_columns
         while len(paint_columns) > 0:
-            sns.pairplot(dataframe[[target_col] + paint_columns[0:max_pairplot_column-1]])
+            plot_columns = [target_col] + paint_columns[0:max_pairplot_column-1]
+            with fnc.stage("grafico", rows=len(dataframe), n_columns=len(plot_columns) - 1):
+                # Los datos de la figura se preparan aquí (histogramas agregados o las columnas a pintar) y el dibujo
+                # se hace aquí mismo o, con output="files", en el pool de exportación
+                if render == "density":
+                    args = (*fnc.pair_histograms(dataframe, plot_columns, bins), plot_columns)
+                    draw = fnc.draw_density_pairplot
+                else:
+                    args = (fnc.to_pandas(dataframe, plot_columns),)
+                    draw = fnc.draw_pairplot
+                path = fnc.figure_path(output_dir, f"pairplot_{target_col}_{len(figures) + 1}", fig_format)
+                figures.append(fnc.export_figure(draw, args, output, path, n_jobs))
             paint_columns = paint_columns[max_pairplot_column-1:]
 
-    return corr_columns
+    result = [corr_columns]
+    # Con output="files" la matriz de correlación se calcula mientras se guardan las figuras
+    if return_corr_matrix:
+        with fnc.stage("estadisticos", n_columns=len(corr_columns) + 1):
+            result.append(fnc.corr_matrix_blocked(dataframe, [target_col] + corr_columns))
+    if output != "show":
+        result.append(figures)
+    return result[0] if len(result) == 1 else tuple(result)
 
-def get_features_cat_regression(df, target_col, columns=[], pvalue=0.05, with_individual_plot=False):
+@fnc.traced
+def get_features_cat_regression(df, target_col, columns=[], pvalue=0.05, with_individual_plot=False, n_jobs=1, cache_dir=None):
     """
     Analiza columnas categóricas para determinar cuáles se asocian significativamente
     con una variable objetivo continua, utilizando pruebas estadísticas (T-Test para
@@ -196,7 +402,7 @@ def get_features_cat_regression(df, target_col, columns=[], pvalue=0.05, with_in
     -----
     Parametros
     -----
-    df : pandas.DataFrame
+    df : pandas.DataFrame | pyarrow.Table | polars.DataFrame
         El DataFrame que contiene la variable objetivo y las columnas categóricas
         a analizar.
 
@@ -217,6 +423,16 @@ def get_features_cat_regression(df, target_col, columns=[], pvalue=0.05, with_in
         Si se establece en True, se generarán diagramas histograma con `sns.histplot`
         para observar la distribución de la variable objetivo separada por las
         categorías de la columna en cuestión.
+
+    n_jobs : int, opcional
+        Número de procesos entre los que repartir las columnas (-1 para usar todos
+        los núcleos). Con datasets pequeños el cálculo se hace en serie.
+
+    cache_dir : str, opcional
+        Directorio de la caché persistente de estadísticos. Si se indica, el
+        estadístico, el p-valor y el número de observaciones de cada columna se
+        guardan ahí y las llamadas posteriores con otro "pvalue" sobre el mismo
+        dataset y target se responden sin recorrer los datos.
     -----
     Retorna:
     -----
@@ -226,36 +442,32 @@ def get_features_cat_regression(df, target_col, columns=[], pvalue=0.05, with_in
      
     significant_columns = []
     
-    # Validaciones iniciales
-    if target_col not in df.columns:
-        print(f"La columna '{target_col}' no está presente en el DataFrame.")
-        return None
+    with fnc.stage("validacion"):
+        # Validaciones iniciales
+        if target_col not in fnc.frame_columns(df):
+            fnc.report_message(f"La columna '{target_col}' no está presente en el DataFrame.")
+            return None
 
-    if not np.issubdtype(df[target_col].dtype, np.number):
-        print(f"La columna '{target_col}' no es numérica continua.")
-        return None
+        profile = fnc.get_column_profile(df)
+        if target_col not in profile.numeric_columns():
+            fnc.report_message(f"La columna '{target_col}' no es numérica continua.")
+            return None
 
-    if not columns:  # Si no se especifican columnas, selecciona categóricas por defecto
-        columns = df.select_dtypes(exclude=[np.number]).columns.tolist()
+        if not columns:  # Si no se especifican columnas, selecciona categóricas por defecto
+            columns = profile.non_numeric_columns()
 
-    if not columns:
-        print("No hay columnas categóricas en el DataFrame.")
-        return None
+        if not columns:
+            fnc.report_message("No hay columnas categóricas en el DataFrame.")
+            return None
+
+    if with_individual_plot:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
 
-    # Probar cada columna categórica
+    # Probar cada columna categórica (T-Test para dos categorías y ANOVA para más de dos)
+    df_stats = fnc.get_cat_stats(df, target_col, columns, n_jobs=n_jobs, cache_dir=cache_dir)
     for col in columns:
-        unique_values = df[col].dropna().unique()
-        if len(unique_values) < 2:
-            continue  # Omitir columnas sin categorías válidas
-
-        # Selección del test estadístico
-        if len(unique_values) == 2:
-            group1 = df[df[col] == unique_values[0]][target_col]
-            group2 = df[df[col] == unique_values[1]][target_col]
-            stat, p = ttest_ind(group1, group2, nan_policy='omit')
-        else:
-            groups = [df[df[col] == val][target_col] for val in unique_values]
-            stat, p = f_oneway(*groups)
+        p = df_stats.loc[col, "p_value"]
 
         # Verificar si el p-valor es significativo
         if p < pvalue:
@@ -263,23 +475,25 @@ def get_features_cat_regression(df, target_col, columns=[], pvalue=0.05, with_in
 
             # Visualización opcional
             if with_individual_plot:
-                plt.figure(figsize=(10, 6))
-                sns.histplot(data=df, x=target_col, hue=col, multiple="stack", kde=True)
-                plt.title(f"Histograma de {target_col} agrupado por {col}")
-                plt.xlabel(target_col)
-                plt.ylabel("Frecuencia")
-                plt.show()
+                with fnc.stage("grafico", column=col, rows=df_stats.loc[col, "n"]):
+                    plt.figure(figsize=(10, 6))
+                    sns.histplot(data=fnc.to_pandas(df, [col, target_col]), x=target_col, hue=col, multiple="stack", kde=True)
+                    plt.title(f"Histograma de {target_col} agrupado por {col}")
+                    plt.xlabel(target_col)
+                    plt.ylabel("Frecuencia")
+                    plt.show()
 
     # Retornar columnas significativas
     if not significant_columns:
-        print("No se encontraron columnas categóricas significativas.")
+        fnc.report_message("No se encontraron columnas categóricas significativas.")
         return None
 
     return significant_columns
 
 
 
-def plot_features_cat_regression(dataframe, target_col = "", columns = [], pvalue = 0.05, with_individual_plot = False, size_group = 3): # Cardinalidad numéricas categóricas.
+@fnc.traced
+def plot_features_cat_regression(dataframe, target_col = "", columns = [], pvalue = 0.05, with_individual_plot = False, size_group = 3, n_jobs = 1, output = "show", output_dir = var.FIGURE_DIR, fig_format = "png"): # Cardinalidad numéricas categóricas.
 
     """
     Pinta los histogramas agrupados de la variable target_col para cada uno de los valores de columns, siempre y cuando el test de significación sea 1-pvalue. 
@@ -292,107 +506,628 @@ def plot_features_cat_regression(dataframe, target_col = "", columns = [], pvalu
     pvalue (float64): valor p.
     with_individual_plot (bool): si es True pinta cada histograma por separado.
     size_group (int): por defecto 3. Si las columnas categóricas tienen más categorías que ese argumento, se dividirán sus plots.
+    n_jobs (int): por defecto 1. Número de procesos entre los que repartir los tests de las columnas y, con output="files", el guardado de las figuras (-1 para usar todos los núcleos).
+    output (str): por defecto "show", que muestra las figuras con plt.show(). "figures" las devuelve sin mostrarlas y "files" las guarda en output_dir desde procesos en segundo plano (backend Agg) sin esperar a que terminen.
+    output_dir (str): directorio donde se guardan las figuras con output="files". Por defecto var.FIGURE_DIR.
+    fig_format (str): formato de los ficheros con output="files": "png" (por defecto) o "svg".
 
     Retorna:
     list: lista con las columnas que se hayan elegido (que tengan significación estadística).
     object: figura o figuras con uno o varios histogramas.
+    list: solo con output="figures" o "files", se devuelve (columnas, figuras): la lista de figuras o, con "files", un concurrent.futures.Future por figura que se resuelve con la ruta del fichero guardado.
     None: si se produce algún error, se devuelve None y un print con la explicación del error.
     """
 
-    sns.set_style = var.SNS_STYLE
-
     # Validación inicial de parámetros
     numeric_types = [var.TIPO_NUM_CONTINUA, var.TIPO_NUM_DISCRETA]
     categoric_types = [var.TIPO_BINARIA, var.TIPO_CATEGORICA]
     if not fnc.is_valid_params(dataframe, target_col, columns, numeric_types, categoric_types):
         return None
+    if output not in var.PLOT_OUTPUTS:
+        fnc.report_message(f"El valor de la variable 'output' debe ser uno de {var.PLOT_OUTPUTS}")
+        return None
+    if fig_format not in var.FIGURE_FORMATS:
+        fnc.report_message(f"El valor de la variable 'fig_format' debe ser uno de {var.FIGURE_FORMATS}")
+        return None
     if len(columns) == 0:
-        df_types = tipifica_variables(dataframe, var.UMBRAL_CATEGORIA, var.UMBRAL_CONTINUA)
-        columns = df_types[df_types[var.COLUMN_TIPO].isin(categoric_types)][var.COLUMN_NOMBRE].to_list()
+        columns = fnc.get_column_profile(dataframe).columns_of_type(categoric_types)
 
     sig_cat_col = []
 
     # Obtenemos el pvalue de las columnas categóricas mediante T de Student y ANOVA
+    # (en el ANOVA solo se consideran las categorías con datos suficientes)
+    df_stats = fnc.get_cat_stats(dataframe, target_col, columns, min_group_size=2, n_jobs=n_jobs)
     for col in columns:
-        cat = dataframe[col].unique()
-        if len(cat) < 2:
-            continue
-        if len(cat) == 2:
-            group0 = dataframe.loc[dataframe[col] == cat[0], target_col]
-            group1 = dataframe.loc[dataframe[col] == cat[1], target_col]
-            p = ttest_ind(group0, group1).pvalue
-        else:
-            groups = [dataframe.loc[dataframe[col] == c, target_col] for c in cat]
-            groups = [g for g in groups if len(g) > 1]  # Validar que haya datos suficientes
-            if len(groups) < 2:
-                continue
-            p = f_oneway(*groups).pvalue
-        if p < pvalue:
+        if df_stats.loc[col, "p_value"] < pvalue:
             sig_cat_col.append(col)
 
     if sig_cat_col:
-        print(f"Las columnas categóricas elegidas son: {sig_cat_col}")
+        fnc.report_message(f"Las columnas categóricas elegidas son: {sig_cat_col}")
     else:
-        print("No se ha seleccionado ninguna columna categórica.")
+        fnc.report_message("No se ha seleccionado ninguna columna categórica.")
         return
 
-    if with_individual_plot:
-        # Generamos gráficos individuales
-        for col in sig_cat_col:
-            unique_categories = dataframe[col].unique()
-            # Dividimos por grupos en caso de que nuestra variable categórica tenga muchas categorías únicas
-            if len(unique_categories) > size_group:
-                num_plots = int(np.ceil(len(unique_categories) / size_group))
-                for i in range(num_plots):
-                    cat_subset = unique_categories[i * size_group:(i + 1) * size_group]
-                    data_subset = dataframe.loc[dataframe[col].isin(cat_subset), [col, target_col]]
-                    if not data_subset.empty:
-                        plt.figure(figsize=(12, 8))
-                        sns.histplot(x=target_col, hue=col, data=data_subset, kde=len(data_subset) > 1)
-                        plt.xlabel(target_col)
-                        plt.ylabel("")
-                        plt.show();
-            else:
-                if not dataframe.empty:
-                    plt.figure(figsize=(12, 8))
-                    sns.histplot(x=target_col, hue=col, data=dataframe, kde=len(dataframe) > 1)
-                    plt.title(f"Relación entre {col} y {target_col}")
-                    plt.xlabel(target_col)
-                    plt.ylabel("")
-                    plt.show();
+    # Con output="files" se dibuja en los procesos de exportación
+    if output != "files":
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        sns.set_style = var.SNS_STYLE
+
+    # Histogramas y KDE de todas las categorías de cada columna en una sola pasada; los gráficos solo pintan estos arrays
+    histograms = {}
+    for col in sig_cat_col:
+        with fnc.stage("grafico", column=col, rows=len(dataframe)):
+            histograms[col] = fnc.category_histograms(dataframe, col, target_col)
+
+    if output == "files":
+        os.makedirs(output_dir, exist_ok=True)
+    figures = []
+
+    # Cada figura se describe con sus paneles (histogramas ya agregados de un grupo de categorías) y se dibuja aquí
+    # mismo o, con output="files", en el pool de exportación
+    def deliver(panels, n_axes, figsize, name, tight_layout=False):
+        path = fnc.figure_path(output_dir, name, fig_format)
+        figures.append(fnc.export_figure(fnc.draw_category_figure, (panels, n_axes, figsize, target_col, tight_layout),
+                                         output, path, n_jobs))
+        if output == "show":
+            plt.show();
+
+    with fnc.stage("grafico", rows=len(dataframe), n_columns=len(sig_cat_col)):
+        if with_individual_plot:
+            # Generamos gráficos individuales
+            for col in sig_cat_col:
+                hist = histograms[col]
+                n_categories = len(hist["categories"])
+                # Dividimos por grupos en caso de que nuestra variable categórica tenga muchas categorías únicas
+                if n_categories > size_group:
+                    num_plots = int(np.ceil(n_categories / size_group))
+                    for i in range(num_plots):
+                        cat_subset = range(i * size_group, min((i + 1) * size_group, n_categories))
+                        if hist["counts"][cat_subset].sum() > 0:
+                            panel = {"hist": fnc.subset_histograms(hist, cat_subset), "col": col}
+                            deliver([panel], 1, (12, 8), f"{col}_{target_col}_{i + 1}")
+                else:
+                    if hist["counts"].sum() > 0:
+                        panel = {"hist": hist, "col": col, "title": f"Relación entre {col} y {target_col}"}
+                        deliver([panel], 1, (12, 8), f"{col}_{target_col}")
     
-    else:
-        # Obtenemos el número total de subplots
-        subplots = 0
-        columns_groups = {}
-        for col in sig_cat_col:
-            unique_categories = dataframe[col].unique()
-            if len(unique_categories) > size_group:
-                num_plots = int(np.ceil(len(unique_categories) / size_group))
-                subplots += num_plots
-                columns_groups[col] = np.array_split(unique_categories, num_plots)
-            else:
-                subplots += 1
-                columns_groups[col] = [unique_categories]
-        # Creamos una figura con subplots
-        fig, axes = plt.subplots(nrows=subplots, ncols=1, figsize=(20, 5 * subplots))
-
-        if subplots == 1:
-            axes = [axes]  # Asegurarse de que sea una lista si hay un único subplot
-            
-        subplot_idx = 0
-        for col, grupos in columns_groups.items():
-            for grupo in grupos:
-                # Filtrar datos por el grupo actual
-                data_filtrada = dataframe[dataframe[col].isin(grupo)]
-                # Ploteamos asegurándonos de que el subdataframe que hemos creado no está vacío
-                if not data_filtrada.empty:
-                    sns.histplot(data = data_filtrada, x = target_col, hue = col, ax = axes[subplot_idx], kde = len(data_filtrada) > 1)
-                    axes[subplot_idx].set_title(f'{col} - Categorías: {list(grupo)}')
-                    axes[subplot_idx].set_xlabel(target_col)
-                    axes[subplot_idx].set_ylabel("")
-                    subplot_idx += 1
-
-        # Ajustamos el diseño y mostramos la figura completa
-        plt.tight_layout()
-        plt.show();
\ No newline at end of file
+        else:
+            # Obtenemos el número total de subplots
+            subplots = 0
+            columns_groups = {}
+            for col in sig_cat_col:
+                n_categories = len(histograms[col]["categories"])
+                if n_categories > size_group:
+                    num_plots = int(np.ceil(n_categories / size_group))
+                    subplots += num_plots
+                    columns_groups[col] = np.array_split(np.arange(n_categories), num_plots)
+                else:
+                    subplots += 1
+                    columns_groups[col] = [np.arange(n_categories)]
+
+            # Un panel por grupo con datos; la figura tiene un subplot por grupo
+            panels = []
+            for col, grupos in columns_groups.items():
+                hist = histograms[col]
+                for grupo in grupos:
+                    if hist["counts"][grupo].sum() > 0:
+                        panels.append({"hist": fnc.subset_histograms(hist, grupo), "col": col,
+                                       "title": f'{col} - Categorías: {list(hist["categories"][grupo])}'})
+
+            # Ajustamos el diseño y mostramos la figura completa
+            deliver(panels, subplots, (20, 5 * subplots), f"cat_regression_{target_col}", tight_layout=True)
+
+    if output != "show":
+        return sig_cat_col, figures
+
+
+@fnc.traced
+def get_features_mi_regression(df, target_col, columns=[], umbral_mi=0.0, pvalue=None, n_permutations=0, bins=var.MI_BINS, random_state=None, n_jobs=1):
+    '''
+    Selecciona features (numéricas y categóricas) por su información mutua con la variable target, que
+    detecta también relaciones no monótonas que la correlación y el ANOVA no ven. El target y las
+    numéricas se discretizan una sola vez por cuantiles y las categóricas usan sus códigos de categoría;
+    la información mutua de todas las columnas se calcula a partir de sus histogramas conjuntos.
+
+    Argumentos:
+    df (pandas.DataFrame | pyarrow.Table | polars.DataFrame): dataframe de entrada.
+    target_col (str): nombre de la columna target. Debe ser numérica con alta cardinalidad.
+    columns (list): columnas a evaluar. Por defecto, todas las columnas distintas del target.
+    umbral_mi (float): información mutua mínima (en nats, mayor o igual que 0) para seleccionar una columna.
+    pvalue (float): nivel de significación del test de permutaciones. Solo se aplica si n_permutations > 0.
+    n_permutations (int): número de permutaciones del target para estimar el p-valor de cada columna. Por defecto 0 (sin test).
+    bins (int): número de intervalos de igual frecuencia del target y de las numéricas. Por defecto var.MI_BINS.
+    random_state (int): semilla de las permutaciones.
+    n_jobs (int): número de procesos entre los que repartir las columnas (-1 para usar todos los núcleos).
+        Con datasets pequeños el cálculo se hace en serie.
+
+    Retorna:
+    list: columnas con información mutua mayor que 'umbral_mi' (y p-valor menor o igual que 'pvalue' si se
+        hace el test de permutaciones), o None si hay algún error en los parámetros.
+    '''
+    with fnc.stage("validacion"):
+        if not isinstance(target_col, str) or target_col not in fnc.frame_columns(df):
+            fnc.report_message(f"Error: no encuentro {target_col} en el dataframe.")
+            return None
+        profile = fnc.get_column_profile(df)
+        if target_col not in profile.numeric_columns():
+            fnc.report_message(f"Error: La columna '{target_col}' debe ser numérica.")
+            return None
+        if profile.cardinality[target_col] < var.UMBRAL_CONTINUA:
+            fnc.report_message(f"Error: La columna {target_col} debe tener alta cardinalidad")
+            return None
+        if umbral_mi < 0:
+            fnc.report_message("Error: El umbral de información mutua debe ser mayor o igual que 0.")
+            return None
+        if pvalue is not None and not 0 <= pvalue <= 1:
+            fnc.report_message("El valor p debe estar entre 0 y 1.")
+            return None
+        if n_permutations < 0 or bins < 2:
+            fnc.report_message("Error: 'n_permutations' debe ser mayor o igual que 0 y 'bins' mayor o igual que 2.")
+            return None
+
+        if len(columns) == 0:
+            columns = [col for col in profile.columns if col != target_col]
+        else:
+            not_exist = [col for col in columns if col not in profile.columns]
+            if not_exist:
+                fnc.report_message(f"Las siguientes columnas no existen en el dataframe: {not_exist}")
+                return None
+            columns = [col for col in columns if col != target_col]
+
+    if len(columns) == 0:
+        return []
+
+    df_stats = fnc.get_mi_stats(df, target_col, columns, bins, n_permutations, random_state, n_jobs)
+    selected = df_stats["mi"] > umbral_mi
+    if n_permutations > 0 and pvalue is not None:
+        selected &= df_stats["p_value"] <= pvalue
+    return [col for col, ok in zip(columns, selected) if ok]
+
+
+@fnc.traced
+def get_features_stability(df, target_col, umbral_corr=0, pvalue=0.05, n_resamples=100, sample_fraction=None, random_state=None, n_jobs=1):
+    '''
+    Selección por estabilidad: repite la selección de get_features_num_regression (features numéricas) y
+    get_features_cat_regression (features categóricas) sobre 'n_resamples' remuestreos de las filas y
+    devuelve con qué frecuencia se ha seleccionado cada columna. Las features con frecuencia alta son
+    robustas al ruido de la muestra; las que entran y salen entre reentrenamientos tienen frecuencias
+    intermedias. Los remuestreos se calculan con pesos por fila (sin copiar el dataframe) y se reparten
+    entre procesos con n_jobs.
+
+    Argumentos:
+    df (pandas.DataFrame | pyarrow.Table | polars.DataFrame): dataframe de entrada.
+    target_col (str): nombre de la columna target. Debe ser numérica con alta cardinalidad.
+    umbral_corr (float): umbral de correlación (valor absoluto) de las features numéricas, entre 0 y 1.
+    pvalue (float): nivel de significación de los tests. Si es None, las numéricas se seleccionan solo por
+        umbral_corr y las categóricas con el nivel por defecto de get_features_cat_regression (0.05).
+    n_resamples (int): número de remuestreos. Por defecto 100.
+    sample_fraction (float): si es None (por defecto) se usan remuestreos bootstrap; si se indica (entre 0 y 1)
+        se usan submuestras sin reemplazamiento con esa fracción de las filas.
+    random_state (int): semilla de los remuestreos.
+    n_jobs (int): número de procesos entre los que repartir los remuestreos (-1 para usar todos los núcleos).
+
+    Retorna:
+    pd.DataFrame: una fila por feature candidata con su tipo ("num" o "cat"), el número de remuestreos en los
+        que se ha seleccionado ("selecciones") y su frecuencia ("frecuencia"), ordenado de mayor a menor
+        frecuencia. None si hay algún error en los parámetros.
+    '''
+    with fnc.stage("validacion"):
+        if not isinstance(target_col, str) or target_col not in fnc.frame_columns(df):
+            fnc.report_message(f"Error: no encuentro {target_col} en el dataframe.")
+            return None
+        profile = fnc.get_column_profile(df)
+        if target_col not in profile.numeric_columns():
+            fnc.report_message(f"Error: La columna '{target_col}' debe ser numérica.")
+            return None
+        if profile.cardinality[target_col] < var.UMBRAL_CONTINUA:
+            fnc.report_message(f"Error: La columna {target_col} debe tener alta cardinalidad")
+            return None
+        if not (0 <= umbral_corr <= 1):
+            fnc.report_message("Error: El umbral de correlación debe estar entre 0 y 1.")
+            return None
+        if pvalue is not None and not 0 <= pvalue <= 1:
+            fnc.report_message("El valor p debe estar entre 0 y 1.")
+            return None
+        if n_resamples < 1 or (sample_fraction is not None and not 0 < sample_fraction <= 1):
+            fnc.report_message("Error: 'n_resamples' debe ser mayor que 0 y 'sample_fraction' estar entre 0 y 1.")
+            return None
+
+    # Las mismas candidatas que get_features_num_regression y get_features_cat_regression
+    num_columns = [col for col in profile.numeric_columns()
+                   if col != target_col and profile.cardinality[col] >= var.UMBRAL_CONTINUA]
+    cat_columns = profile.non_numeric_columns()
+    # Sin pvalue las categóricas se evalúan aparte con el nivel por defecto de get_features_cat_regression
+    counts = fnc.stability_counts(df, target_col, num_columns, cat_columns if pvalue is not None else [], umbral_corr,
+                                  pvalue, n_resamples, sample_fraction, random_state, n_jobs=n_jobs)
+    if pvalue is None and cat_columns:
+        counts.update(fnc.stability_counts(df, target_col, [], cat_columns, pvalue=0.05, n_resamples=n_resamples,
+                                           sample_fraction=sample_fraction, random_state=random_state, n_jobs=n_jobs))
+
+    columns = num_columns + cat_columns
+    df_stability = pd.DataFrame({"tipo": ["num"] * len(num_columns) + ["cat"] * len(cat_columns),
+                                 "selecciones": [int(counts[col]) for col in columns]}, index=pd.Index(columns, dtype=object))
+    df_stability["frecuencia"] = df_stability["selecciones"] / n_resamples
+    return df_stability.sort_values("frecuencia", ascending=False, kind="stable")
+
+
+@fnc.traced
+def get_features_num_classification(df, target_col, columns=[], pvalue=0.05, n_jobs=1):
+    '''
+    Selecciona las features numéricas cuya distribución difiere significativamente entre las clases de un
+    target de clasificación, con un ANOVA de un factor (F) por columna. Las sumas y sumas de cuadrados por
+    clase de todas las columnas se calculan a la vez en una sola pasada matricial.
+
+    Argumentos:
+    df (pandas.DataFrame | pyarrow.Table | polars.DataFrame): dataframe de entrada.
+    target_col (str): nombre de la columna target. Debe ser de tipo Binaria o Categórica según tipifica_variables.
+    columns (list): columnas numéricas a evaluar. Por defecto, las columnas numéricas (Numérica Continua o
+        Numérica Discreta según tipifica_variables) distintas del target.
+    pvalue (float): nivel de significación del test. Por defecto 0.05.
+    n_jobs (int): número de procesos entre los que repartir las columnas (-1 para usar todos los núcleos).
+        Con datasets pequeños el cálculo se hace en serie.
+
+    Retorna:
+    list: columnas con p-valor menor que 'pvalue', o None si hay algún error en los parámetros.
+    '''
+    with fnc.stage("validacion"):
+        if not isinstance(target_col, str) or target_col not in fnc.frame_columns(df):
+            fnc.report_message(f"Error: no encuentro {target_col} en el dataframe.")
+            return None
+        profile = fnc.get_column_profile(df)
+        target_types = [var.TIPO_BINARIA, var.TIPO_CATEGORICA]
+        if target_col not in profile.columns_of_type(target_types):
+            fnc.report_message(f"Error: La columna '{target_col}' debe ser una variable de tipo {target_types}.")
+            return None
+        if not 0 <= pvalue <= 1:
+            fnc.report_message("El valor p debe estar entre 0 y 1.")
+            return None
+
+        numeric_columns = profile.numeric_columns()
+        if len(columns) == 0:
+            columns = [col for col in profile.columns_of_type(var.TIPO_NUMERIC) if col in numeric_columns and col != target_col]
+        else:
+            not_numeric = [col for col in columns if col not in numeric_columns]
+            if not_numeric:
+                fnc.report_message(f"Las siguientes columnas no son numéricas: {not_numeric}")
+                return None
+            columns = [col for col in columns if col != target_col]
+
+    if len(columns) == 0:
+        return []
+
+    # F y p-valor de todas las columnas a la vez
+    df_stats = fnc.get_class_stats_num(df, target_col, columns, n_jobs=n_jobs)
+    return [col for col, p in zip(columns, df_stats["p_value"]) if p < pvalue]
+
+
+@fnc.traced
+def get_features_cat_classification(df, target_col, columns=[], pvalue=0.05, test="chi2", n_jobs=1):
+    '''
+    Selecciona las features categóricas asociadas significativamente con un target de clasificación mediante
+    un test de independencia sobre su tabla de contingencia. Las tablas se construyen dispersas (solo las
+    celdas no vacías), de modo que el coste no depende del número de categorías de las columnas.
+
+    Argumentos:
+    df (pandas.DataFrame | pyarrow.Table | polars.DataFrame): dataframe de entrada.
+    target_col (str): nombre de la columna target. Debe ser de tipo Binaria o Categórica según tipifica_variables.
+    columns (list): columnas categóricas a evaluar. Por defecto, las columnas de tipo Binaria o Categórica
+        según tipifica_variables distintas del target.
+    pvalue (float): nivel de significación del test. Por defecto 0.05.
+    test (str): "chi2" (chi-cuadrado de Pearson, por defecto) o "g" (G-test de razón de verosimilitudes). En las
+        tablas 2x2 se aplica la corrección de Yates, como en scipy.stats.chi2_contingency.
+    n_jobs (int): número de procesos entre los que repartir las columnas (-1 para usar todos los núcleos).
+        Con datasets pequeños el cálculo se hace en serie.
+
+    Retorna:
+    list: columnas con p-valor menor que 'pvalue', o None si hay algún error en los parámetros.
+        La V de Cramér de cada columna se obtiene con fnc.get_contingency_stats.
+    '''
+    with fnc.stage("validacion"):
+        if not isinstance(target_col, str) or target_col not in fnc.frame_columns(df):
+            fnc.report_message(f"Error: no encuentro {target_col} en el dataframe.")
+            return None
+        profile = fnc.get_column_profile(df)
+        categoric_types = [var.TIPO_BINARIA, var.TIPO_CATEGORICA]
+        categoric_columns = profile.columns_of_type(categoric_types)
+        if target_col not in categoric_columns:
+            fnc.report_message(f"Error: La columna '{target_col}' debe ser una variable de tipo {categoric_types}.")
+            return None
+        if not 0 <= pvalue <= 1:
+            fnc.report_message("El valor p debe estar entre 0 y 1.")
+            return None
+        if test not in var.CONTINGENCY_TESTS:
+            fnc.report_message(f"Error: El test debe ser uno de {var.CONTINGENCY_TESTS}.")
+            return None
+
+        if len(columns) == 0:
+            columns = [col for col in categoric_columns if col != target_col]
+        else:
+            not_exist = [col for col in columns if col not in profile.columns]
+            if not_exist:
+                fnc.report_message(f"Las siguientes columnas no existen en el dataframe: {not_exist}")
+                return None
+            columns = [col for col in columns if col != target_col]
+
+    if len(columns) == 0:
+        return []
+
+    # Test de independencia de todas las columnas por lotes
+    df_stats = fnc.get_contingency_stats(df, target_col, columns, test=test, n_jobs=n_jobs)
+    return [col for col, p in zip(columns, df_stats["p_value"]) if p < pvalue]
+
+
+class FeatureScreener:
+    """
+    Cribado incremental de features para datos que llegan por lotes. En lugar de concatenar todos los lotes y volver a
+    ejecutar get_features_num_regression y get_features_cat_regression, mantiene estadísticos acumulados que se pueden
+    combinar: momentos de Welford y co-momentos de cada columna numérica con el target, y recuento, media y suma de
+    cuadrados del target por categoría. Actualizar la selección cuesta O(filas nuevas).
+
+    Argumentos:
+    target_col (str): nombre de la columna target (numérica).
+    num_columns (list): columnas numéricas a seguir. Por defecto, las numéricas del primer lote (sin el target).
+    cat_columns (list): columnas categóricas a seguir. Por defecto, las no numéricas del primer lote.
+
+    Uso:
+    screener = FeatureScreener("price")
+    for batch in batches:
+        screener.partial_fit(batch)
+    screener.get_features_num_regression(0.3, 0.05)
+    """
+
+    def __init__(self, target_col, num_columns=None, cat_columns=None):
+        self.target_col = target_col
+        self.num_columns = None if num_columns is None else list(num_columns)
+        self.cat_columns = None if cat_columns is None else list(cat_columns)
+        self.n_rows = 0
+        self.num_moments = None
+        self.cat_moments = {}
+        self.cardinality = {}
+
+    def partial_fit(self, batch):
+        '''
+        Incorpora un lote (pd.DataFrame) a los estadísticos acumulados.
+
+        Retorna:
+        FeatureScreener: el propio objeto, para poder encadenar llamadas.
+        '''
+        if not np.issubdtype(batch[self.target_col].dtype, np.number):
+            raise ValueError(f"La columna '{self.target_col}' debe ser numérica.")
+        if self.num_columns is None:
+            self.num_columns = [col for col in batch.select_dtypes(include=np.number).columns if col != self.target_col]
+        if self.cat_columns is None:
+            self.cat_columns = batch.select_dtypes(exclude=[np.number]).columns.tolist()
+
+        y = batch[self.target_col].to_numpy(dtype=np.float64, na_value=np.nan)
+        moments = fnc.pairwise_moments(batch[self.num_columns].to_numpy(dtype=np.float64, na_value=np.nan), y)
+        self.num_moments = moments if self.num_moments is None else fnc.merge_pairwise_moments(self.num_moments, moments)
+
+        for col in self.cat_columns:
+            moments = fnc.category_moments(batch[col], y)
+            self.cat_moments[col] = fnc.merge_category_moments(self.cat_moments[col], moments) if col in self.cat_moments else moments
+
+        # Cardinalidad (exacta en el rango que decide la selección) del target y de las numéricas
+        for col in [self.target_col] + self.num_columns:
+            self.cardinality.setdefault(col, fnc.CardinalityCounter()).add(batch[col].dropna().to_numpy())
+
+        self.n_rows += len(batch)
+        return self
+
+    def merge(self, other):
+        '''
+        Combina los estadísticos de otro FeatureScreener con el mismo target (por ejemplo, de otra partición).
+
+        Retorna:
+        FeatureScreener: el propio objeto, con los estadísticos de ambos.
+        '''
+        if other.num_moments is None:
+            return self
+        if self.num_moments is None:
+            self.num_columns, self.cat_columns = list(other.num_columns), list(other.cat_columns)
+            self.num_moments = dict(other.num_moments)
+        elif self.num_columns != other.num_columns:
+            raise ValueError("Los FeatureScreener a combinar deben seguir las mismas columnas numéricas")
+        else:
+            self.num_moments = fnc.merge_pairwise_moments(self.num_moments, other.num_moments)
+
+        for col, moments in other.cat_moments.items():
+            self.cat_moments[col] = fnc.merge_category_moments(self.cat_moments[col], moments) if col in self.cat_moments else moments
+        for col, counter in other.cardinality.items():
+            self.cardinality.setdefault(col, fnc.CardinalityCounter()).merge(counter)
+
+        self.n_rows += other.n_rows
+        return self
+
+    def num_stats(self):
+        '''
+        Retorna:
+        pd.DataFrame: correlación ('corr'), p-valor ('p_value') y número de observaciones ('n') de cada columna numérica
+        con el target, igual que fnc.get_corr_stats_num sobre todos los lotes concatenados.
+        '''
+        corrs, p_vals, n = fnc.pearson_from_moments(self.num_moments)
+        return pd.DataFrame({"corr": corrs, "p_value": p_vals, "n": n}, index=pd.Index(self.num_columns, dtype=object))
+
+    def cat_stats(self, min_group_size=1):
+        '''
+        Retorna:
+        pd.DataFrame: estadístico ('stat'), p-valor ('p_value'), observaciones ('n') y grupos ('n_groups') del test de
+        diferencia de medias de cada columna categórica, igual que fnc.get_cat_stats sobre todos los lotes concatenados.
+        '''
+        results = [fnc.mean_diff_test(self.cat_moments[col]["count"], self.cat_moments[col]["mean"], self.cat_moments[col]["m2"], min_group_size)
+                   for col in self.cat_columns]
+        return pd.DataFrame(results, index=pd.Index(self.cat_columns, dtype=object), columns=["stat", "p_value", "n", "n_groups"])
+
+    def get_features_num_regression(self, umbral_corr, pvalue=None):
+        '''
+        Misma selección que get_features_num_regression sobre todos los lotes vistos hasta el momento.
+
+        Retorna:
+        Lista de columnas que cumplen los criterios o None si hay error
+        '''
+        if self.num_moments is None:
+            fnc.report_message("Error: no se ha incorporado ningún lote de datos.")
+            return None
+        if self.cardinality[self.target_col].count() < var.UMBRAL_CONTINUA:
+            fnc.report_message(f"Error: La columna {self.target_col} debe tener alta cardinalidad")
+            return None
+        if not (0 <= umbral_corr <= 1):
+            fnc.report_message("Error: El umbral de correlación debe estar entre 0 y 1.")
+            return None
+        if pvalue is not None and not 0 <= pvalue <= 1:
+            fnc.report_message("El valor p debe estar entre 0 y 1.")
+            return None
+
+        df_stats = self.num_stats()
+        features_num = []
+        for col in self.num_columns:
+            # Se excluyen las numéricas con cardinalidad baja que pueden ser consideradas categóricas
+            if self.cardinality[col].count() < var.UMBRAL_CONTINUA:
+                continue
+            corr, p_val = df_stats.loc[col, "corr"], df_stats.loc[col, "p_value"]
+            if abs(corr) > umbral_corr and (pvalue is None or p_val <= pvalue):
+                features_num.append(col)
+        return features_num
+
+    def get_features_cat_regression(self, pvalue=0.05, columns=None):
+        '''
+        Misma selección que get_features_cat_regression sobre todos los lotes vistos hasta el momento.
+
+        Retorna:
+        list: columnas categóricas significativas, o None si no hay ninguna
+        '''
+        columns = self.cat_columns if not columns else columns
+        if not columns:
+            fnc.report_message("No hay columnas categóricas en el DataFrame.")
+            return None
+
+        df_stats = self.cat_stats()
+        significant_columns = [col for col in columns if df_stats.loc[col, "p_value"] < pvalue]
+        if not significant_columns:
+            fnc.report_message("No se encontraron columnas categóricas significativas.")
+            return None
+        return significant_columns
+
+
+# Perfila y selecciona las features de un fichero para main() y escribe su informe. Devuelve un resumen con el estado
+# ("ok", "skip" si el informe ya estaba al día, "invalid" si el target no es válido para la selección o "error"), la ruta
+# del manifiesto y el tiempo empleado. Los ficheros con estado "invalid" o "error" no dejan informe
+def _screen_file(path, target, output_dir, umbral_corr=0.0, pvalue=0.05, fmt="json", force=False):
+    import contextlib
+    import io
+    import json
+    import time
+
+    start = time.perf_counter()
+    params = {"target": target, "umbral_corr": umbral_corr, "pvalue": pvalue, "format": fmt}
+    paths = fnc.report_paths(path, output_dir, fmt)
+    summary = {"source": path, "report": paths["manifest"]}
+    try:
+        if not force and fnc.report_is_current(path, paths, params):
+            return dict(summary, status="skip", seconds=time.perf_counter() - start)
+        stat = os.stat(path)
+        df = fnc.read_dataset(path)
+        # Los mensajes de las funciones van al informe en lugar de a la consola, donde se mezclarían entre procesos
+        with contextlib.redirect_stdout(io.StringIO()), fnc.trace() as report:
+            describe = describe_df(df)
+            tipos = tipifica_variables(df)
+            features_num = get_features_num_regression(df, target, umbral_corr, pvalue)
+            # get_features_num_regression solo devuelve None si el target o los parámetros no son válidos (sin
+            # features seleccionadas devuelve una lista vacía); en ese caso la selección categórica tampoco tiene sentido
+            if features_num is not None:
+                features_cat = get_features_cat_regression(df, target, pvalue=pvalue)
+        messages = [m["message"] for m in report.messages]
+        if features_num is None:
+            return dict(summary, status="invalid", error="; ".join(messages), seconds=time.perf_counter() - start)
+        describe = describe.astype({"DATA_TYPE": str})
+
+        manifest = {"version": var.REPORT_VERSION, "params": params,
+                    "source": {"path": os.path.abspath(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns},
+                    "n_rows": len(df), "features_num": features_num, "features_cat": features_cat,
+                    "messages": messages, "stages": json.loads(report.summary().to_json(orient="index"))}
+        os.makedirs(output_dir, exist_ok=True)
+        if fmt == "parquet":
+            describe.to_parquet(paths["describe"])
+            tipos.to_parquet(paths["tipos"])
+        else:
+            manifest["describe"] = json.loads(describe.to_json(orient="index"))
+            manifest["tipos"] = dict(zip(tipos["variable"], tipos["tipo"]))
+        # El manifiesto se escribe el último y de forma atómica: si existe, el informe está completo
+        tmp_path = f"{paths['manifest']}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, paths["manifest"])
+        return dict(summary, status="ok", seconds=time.perf_counter() - start)
+    except Exception as e:
+        return dict(summary, status="error", error=f"{type(e).__name__}: {e}", seconds=time.perf_counter() - start)
+
+
+# Procesa los ficheros con como mucho 'workers' procesos a la vez y devuelve (según van terminando) el resumen de cada uno
+def _run_screen(paths, target, output_dir, umbral_corr=0.0, pvalue=0.05, fmt="json", workers=1, force=False):
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    workers = min(fnc.resolve_n_jobs(workers), max(len(paths), 1))
+    if workers == 1:
+        for path in paths:
+            yield _screen_file(path, target, output_dir, umbral_corr, pvalue, fmt, force)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_screen_file, path, target, output_dir, umbral_corr, pvalue, fmt, force) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    '''
+    Punto de entrada de línea de comandos para procesar varios datasets sin abrir un notebook:
+
+        python -m toolbox_ML screen --target price data/*.csv
+
+    Para cada fichero (CSV o Parquet) ejecuta describe_df, tipifica_variables, get_features_num_regression
+    y get_features_cat_regression y escribe un informe en --output-dir (JSON o, con --format parquet,
+    las tablas en Parquet y un manifiesto JSON). Los ficheros se procesan en paralelo con como mucho
+    --workers procesos y los informes que ya están al día (mismo fichero y mismos parámetros) se omiten.
+
+    Retorna:
+    int: código de salida (0 si todos los ficheros se han procesado, 1 si alguno ha fallado o si el target
+    no es válido en alguno de ellos, por ejemplo porque no existe).
+    '''
+    import argparse
+    import glob
+
+    parser = argparse.ArgumentParser(prog="python -m toolbox_ML", description="Perfilado y selección de features por lotes")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    screen = subparsers.add_parser("screen", help="perfila y selecciona las features de varios ficheros")
+    screen.add_argument("files", nargs="+", help="ficheros CSV o Parquet (se admiten patrones como data/*.csv)")
+    screen.add_argument("--target", required=True, help="columna target")
+    screen.add_argument("--umbral-corr", type=float, default=0.0, help="umbral de correlación de get_features_num_regression")
+    screen.add_argument("--pvalue", type=float, default=0.05, help="nivel de significación de los tests")
+    screen.add_argument("--output-dir", default=var.REPORT_DIR, help="directorio de los informes")
+    screen.add_argument("--format", choices=["json", "parquet"], default="json", help="formato de las tablas del informe")
+    screen.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="procesos simultáneos (-1 para todos los núcleos)")
+    screen.add_argument("--force", action="store_true", help="regenera también los informes que están al día")
+    args = parser.parse_args(argv)
+
+    # Los patrones se expanden aquí para que funcionen también en shells que no los expanden
+    paths = []
+    for pattern in args.files:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    paths = list(dict.fromkeys(paths))
+
+    failed = 0
+    for summary in _run_screen(paths, args.target, args.output_dir, args.umbral_corr, args.pvalue,
+                               args.format, args.workers, args.force):
+        if summary["status"] in ("error", "invalid"):
+            failed += 1
+            print(f"{summary['status'].upper()} {summary['source']}: {summary['error']}")
+        elif summary["status"] == "skip":
+            print(f"SKIP  {summary['source']} (informe al día: {summary['report']})")
+        else:
+            print(f"OK    {summary['source']} -> {summary['report']} ({summary['seconds']:.2f} s)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -17,4 +17,85 @@ UMBRAL_CATEGORIA = 10
 UMBRAL_CONTINUA = 15
 
 # Estilo de los graficos de Seaborn
-SNS_STYLE = "whitegrid"
\ No newline at end of file
+SNS_STYLE = "whitegrid"
+
+# Número máximo de perfiles de columnas (ColumnProfile) que se mantienen en caché
+PROFILE_CACHE_SIZE = 16
+# Número aproximado de filas muestreadas para calcular la huella de un dataframe en la caché de perfiles
+PROFILE_SAMPLE_ROWS = 1000
+
+# Presupuesto de memoria (bytes) por defecto para el perfilado por bloques de ficheros que no caben en memoria
+CHUNK_MEMORY_BUDGET = 512 * 1024**2
+# Filas que se leen para estimar el tamaño por fila de un CSV antes de calcular el tamaño de bloque
+CHUNK_SAMPLE_ROWS = 1000
+# Estimación conservadora de bytes por valor único guardado al contar cardinalidades exactas
+BYTES_PER_UNIQUE_VALUE = 100
+
+# Precisión (bits de índice) de los sketches HyperLogLog usados en el modo aproximado de cardinalidad
+HLL_PRECISION = 14
+# Cardinalidad hasta la que el modo aproximado sigue contando valores únicos de forma exacta
+HLL_EXACT_LIMIT = 1024
+# Filas que se hashean a la vez al alimentar los contadores de cardinalidad del modo aproximado
+HLL_BATCH_ROWS = 65_536
+
+# Tamaño mínimo (filas x columnas) a partir del cual el cribado de columnas con n_jobs > 1 se reparte entre procesos
+PARALLEL_MIN_CELLS = 2_000_000
+# Lotes de columnas por proceso al repartir el cribado (más lotes equilibran mejor la carga)
+PARALLEL_BATCHES_PER_JOB = 4
+
+# Número de filas a partir del cual plot_features_num_regression pinta densidades agregadas en lugar de puntos
+DENSITY_MIN_ROWS = 100_000
+# Número de intervalos por eje de los histogramas 2D del modo de densidad
+DENSITY_BINS = 64
+
+# Número de bins de los histogramas del target por categoría de plot_features_cat_regression
+HIST_BINS = 30
+# Subdivisiones de cada bin en la rejilla fina sobre la que se calculan las KDE
+KDE_GRID_FACTOR = 8
+
+# Nombre del directorio (junto al CSV) donde se guarda por defecto la caché columnar de los CSV
+CACHE_DIR_NAME = ".toolbox_cache"
+# Versión del formato de la caché columnar; al cambiarla se regeneran las cachés existentes
+CACHE_VERSION = 1
+
+# Métodos de correlación disponibles en la selección de features numéricas
+CORR_METHODS = ("pearson", "spearman", "kendall")
+# Celdas (filas x columnas) máximas que se ordenan a la vez al calcular correlaciones de rangos
+RANK_BLOCK_CELLS = 10_000_000
+
+# Tests de independencia disponibles entre variables categóricas: chi-cuadrado de Pearson y G-test
+CONTINGENCY_TESTS = ("chi2", "g")
+# Tamaño máximo del espacio de códigos (columna, categoría, clase) para contar las celdas con bincount; por encima se usa np.unique
+CONTINGENCY_DENSE_CELLS = 10_000_000
+# Celdas (filas x columnas) máximas de cada lote de columnas en los tests de independencia
+CONTINGENCY_BATCH_CELLS = 10_000_000
+
+# Número de intervalos de igual frecuencia en los que se discretizan el target y las numéricas para la información mutua
+MI_BINS = 10
+
+# Memoria de trabajo aproximada (bytes) para calcular por bloques la matriz de correlación entre features
+CORR_MATRIX_MEMORY_BUDGET = 256 * 1024**2
+
+# Celdas (remuestreos x filas) máximas de la matriz de pesos que se procesa a la vez en la selección por estabilidad
+STABILITY_CHUNK_CELLS = 16_000_000
+
+# Versión del formato de los informes de la ejecución por lotes; al cambiarla se regeneran los informes existentes
+REPORT_VERSION = 1
+# Directorio por defecto de los informes de la ejecución por lotes
+REPORT_DIR = "reports"
+
+# Proporción máxima de valores únicos (sobre el número de filas) con la que optimize_df convierte una columna de texto
+# que no es Binaria ni Categórica a 'category'
+CATEGORY_MAX_RATIO = 0.5
+
+# Modos de salida de las funciones que pintan: mostrar las figuras, devolverlas o guardarlas en disco en segundo plano
+PLOT_OUTPUTS = ("show", "figures", "files")
+# Formatos de fichero admitidos al guardar las figuras
+FIGURE_FORMATS = ("png", "svg")
+# Directorio por defecto de las figuras guardadas
+FIGURE_DIR = "figures"
+
+# Tamaño máximo (bytes) del directorio de la caché persistente de estadísticos; al superarlo se borran las entradas usadas hace más tiempo
+STATS_CACHE_MAX_BYTES = 256 * 1024**2
+# Versión del formato de la caché de estadísticos; al cambiarla las entradas existentes dejan de usarse
+STATS_CACHE_VERSION = 1